@@ -1,7 +1,11 @@
 from flask import Flask, jsonify, request, g, make_response
-import requests, time, math, statistics, os, sqlite3, secrets, random
+import requests, time, math, statistics, os, sqlite3, secrets, threading, atexit
+import bisect, hashlib, logging, functools, multiprocessing, operator, queue
 import datetime as dt
+import numpy as np
+import orjson
 from flask_cors import CORS
+from flask_compress import Compress
 from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 from itsdangerous import TimestampSigner, BadSignature
@@ -10,11 +14,42 @@ from urllib3.util.retry import Retry
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
 from contextlib import contextmanager
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from quant import (
+    HAVE_NUMBA, njit, dca_accum, gbm_scenarios, gbm_worker, init_worker, log_return_stats,
+    lttb_indices,
+    percentile_bands, series_pairs, simulate_dca, simulate_gbm_paths, warm_up,
+)
 
 app = Flask(__name__)
 load_dotenv()
+
+# simulation-pool workers (_sim_pool) are spawned; when the app was started as a
+# script (python app.py) each one re-runs this file as __mp_main__. They only need
+# quant.py, so the process-wide side effects below (DB pool, refresher threads,
+# warm-up) skip them. (parent_process() is still None while that re-run happens.)
+_IN_POOL_CHILD = (
+    __name__ == "__mp_main__" or multiprocessing.current_process().name != "MainProcess"
+)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
+# under gunicorn (Procfile) app.logger has no handler and inherits WARNING, so the
+# info lines (schema init, warm-up) were dropped: log through gunicorn's handlers
+# at its --log-level instead. Otherwise (python app.py) app.debug is still False at
+# import time, so set INFO explicitly rather than inherit the root WARNING.
+_gunicorn_log = logging.getLogger("gunicorn.error")
+if _gunicorn_log.handlers:
+    app.logger.handlers = _gunicorn_log.handlers
+    app.logger.setLevel(_gunicorn_log.level)
+elif not app.logger.level:
+    app.logger.setLevel(logging.INFO)
+
 ONE_DAY = 24 * 3600
 ONE_YEAR = 365 * ONE_DAY
 CRYPTOCOMPARE_API_KEY = os.getenv("CRYPTOCOMPARE_API_KEY", "")
@@ -36,36 +71,57 @@ signer = TimestampSigner(app.config["SECRET_KEY"])
 DB_URL  = os.getenv("DATABASE_URL")
 DB_PATH = os.getenv("DB_PATH", "app.db")
 
+def _pg_connect_kwargs():
+    """
+    psycopg connect() kwargs parsed from DATABASE_URL.
+    Defaults sslmode=require if the URL does not set it.
+    """
+    from urllib.parse import urlparse, parse_qs
+    from psycopg.rows import dict_row
+
+    u = urlparse(DB_URL)
+    q = parse_qs(u.query)
+
+    # Pick host (DNS) and optional hostaddr (IPv4) from query
+    return dict(
+        host=u.hostname,
+        hostaddr=(q.get("hostaddr", [None])[0]),   # leave None if not provided
+        port=u.port or 5432,
+        dbname=(u.path or "/postgres").lstrip("/"),
+        user=(u.username or "postgres"),
+        password=u.password,
+        sslmode=(q.get("sslmode", ["require"])[0]),
+        connect_timeout=int(q.get("connect_timeout", ["5"])[0]),
+        row_factory=dict_row,
+    )
+
+
+# One pool per worker process: handlers borrow a connection instead of paying
+# a TCP+TLS+auth handshake per request. Opening is non-blocking, so a briefly
+# unavailable DB does not crash the import.
+DB_POOL = None
+if DB_URL and not _IN_POOL_CHILD:
+    from psycopg_pool import ConnectionPool
+
+    DB_POOL = ConnectionPool(
+        conninfo="",
+        kwargs=_pg_connect_kwargs(),
+        min_size=int(os.getenv("DB_POOL_MIN", "2")),
+        max_size=int(os.getenv("DB_POOL_MAX", "10")),
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),  # wait for a free conn
+        open=True,
+    )
+    atexit.register(DB_POOL.close)
+
+
 def _db():
     """
-    Postgres when DATABASE_URL is set, else SQLite.
-    Appends sslmode=require to Postgres URL if missing.
+    Pooled Postgres connection when DATABASE_URL is set, else SQLite.
+    Use as `with _db() as conn:` -- on Postgres the block commits and
+    hands the connection back to the pool on exit.
     """
-    if DB_URL:
-        import os, psycopg
-        from urllib.parse import urlparse, parse_qs
-        from psycopg.rows import dict_row
-
-        u = urlparse(DB_URL)
-        q = parse_qs(u.query)
-
-        # Pick host (DNS) and optional hostaddr (IPv4) from query
-        host = u.hostname
-        hostaddr = (q.get("hostaddr", [None])[0])  # optional
-        sslmode = (q.get("sslmode", ["require"])[0])
-        timeout = int(q.get("connect_timeout", ["5"])[0])
-
-        return psycopg.connect(
-            host=host,
-            hostaddr=hostaddr,   # leave None if not provided
-            port=u.port or 5432,
-            dbname=(u.path or "/postgres").lstrip("/"),
-            user=(u.username or "postgres"),
-            password=u.password,
-            sslmode=sslmode,
-            connect_timeout=timeout,
-            row_factory=dict_row,
-        )
+    if DB_POOL is not None:
+        return DB_POOL.connection()
     else:
         conn = sqlite3.connect(DB_PATH, check_same_thread=False)
         conn.execute("PRAGMA journal_mode=WAL;")
@@ -137,6 +193,117 @@ def _init_db():
 
 
 
+# ---- SQL (SQLite placeholders; rewritten once for Postgres at import) ----
+_SQL_SQLITE = {
+    "list_holdings": (
+        'SELECT id, coin, amount, buy_price AS "buyPrice", ccy, created_at '
+        "FROM holdings WHERE user_id=? ORDER BY created_at DESC"
+    ),
+    "holding_amounts": "SELECT coin, amount FROM holdings WHERE user_id=?",
+    "upsert_holding": """
+        INSERT INTO holdings (id, user_id, coin, amount, buy_price, created_at, ccy)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE
+          SET coin=excluded.coin,
+              amount=excluded.amount,
+              buy_price=excluded.buy_price,
+              ccy=excluded.ccy
+          WHERE holdings.user_id = excluded.user_id
+        RETURNING id, coin, amount, buy_price AS "buyPrice", ccy, created_at
+        """,
+    "delete_holding": "DELETE FROM holdings WHERE id=? AND user_id=?",
+    "list_alerts": (
+        "SELECT id, coin, op, value, ccy, created_at "
+        "FROM alerts WHERE user_id=? ORDER BY created_at DESC"
+    ),
+    "upsert_alert": """
+        INSERT INTO alerts (id, user_id, coin, op, value, created_at, ccy)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (id) DO UPDATE
+          SET coin=excluded.coin,
+              op=excluded.op,
+              value=excluded.value,
+              ccy=excluded.ccy
+          WHERE alerts.user_id = excluded.user_id
+        RETURNING id, coin, op, value, ccy
+        """,
+    "delete_alert": "DELETE FROM alerts WHERE id=? AND user_id=?",
+    "get_goal": "SELECT amount, date, ccy FROM goals WHERE user_id=?",
+    "put_goal": """
+        INSERT INTO goals (user_id, amount, date, ccy)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE
+          SET amount=excluded.amount,
+              date=excluded.date,
+              ccy=excluded.ccy
+        """,
+}
+# statements contain no literal '?', so a plain replace is safe
+SQL = (
+    {k: q.replace("?", "%s") for k, q in _SQL_SQLITE.items()} if DB_URL else _SQL_SQLITE
+)
+
+
+def _json_body():
+    """
+    Request body parsed with orjson (faster than the stdlib json behind get_json).
+    Returns {} for an empty body and None when the body is not a JSON object.
+    """
+    try:
+        data = orjson.loads(request.get_data() or b"{}")
+    except orjson.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def jsonify_fast(obj, status=200):
+    """jsonify() for large payloads: orjson encoding, NumPy arrays serialized natively."""
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY),
+        status=status,
+        mimetype="application/json",
+    )
+
+
+STREAM_MIN_POINTS = 1000  # longer series are streamed instead of built whole
+STREAM_CHUNK = 512  # pairs encoded per chunk
+SERIES_MAX_POINTS = 512  # default chart resolution (?max_points=N, ?raw=1 for every point)
+
+
+def _series_max_points():
+    """This request's chart resolution: None for ?raw=1, else >= 3 (ValueError if bad or < 3)."""
+    if request.args.get("raw") == "1":
+        return None
+    n = int(request.args.get("max_points", str(SERIES_MAX_POINTS)))
+    if n < 3:  # LTTB keeps both endpoints plus at least one bucket
+        raise ValueError("max_points must be >= 3")
+    return n
+
+
+def jsonify_series(payload, ts, values, key="series", max_points=None):
+    """
+    jsonify_fast({**payload, key: series_pairs(ts, values)}), LTTB-downsampled to
+    max_points first when given. Past STREAM_MIN_POINTS the series is encoded and
+    sent chunk by chunk, so neither the full pair list nor the full body is held
+    in memory (same JSON, series first).
+    """
+    if max_points is not None and len(ts) > max_points:
+        idx = lttb_indices(ts, values, max_points)
+        ts, values = ts[idx], values[idx]
+    if len(ts) <= STREAM_MIN_POINTS:
+        return jsonify_fast({**payload, key: series_pairs(ts, values)})
+    head = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def body():
+        yield b"{" + orjson.dumps(key) + b":["
+        for i in range(0, len(ts), STREAM_CHUNK):
+            pairs = orjson.dumps(series_pairs(ts[i:i + STREAM_CHUNK], values[i:i + STREAM_CHUNK]))
+            yield (b"," if i else b"") + pairs[1:-1]
+        yield b"]" + (b"," + head[1:] if len(head) > 2 else b"}")
+
+    return app.response_class(body(), mimetype="application/json")
+
+
 # Allow cookies from your frontend
 CORS(
     app,
@@ -144,11 +311,20 @@ CORS(
     supports_credentials=True,
 )
 
+@functools.lru_cache(maxsize=8192)
+def _verify_cookie(raw: str, _day: int) -> str:
+    """
+    HMAC-check a signed uid cookie (BadSignature propagates and is not cached).
+    `_day` only buckets the cache so max_age is re-checked at least daily.
+    """
+    return signer.unsign(raw, max_age=365 * 24 * 3600).decode()
+
+
 def _ensure_uid():
     raw = request.cookies.get("uid")
     if raw:
         try:
-            uid = signer.unsign(raw, max_age=365 * 24 * 3600).decode()
+            uid = _verify_cookie(raw, int(time.time() // ONE_DAY))
             g.uid = uid
             g._needs_cookie = False
             return
@@ -184,11 +360,33 @@ def _after_any_response(resp):
             resp.headers["Cache-Control"] = "public, max-age=30"
         elif path.startswith("/api/history"):
             resp.headers["Cache-Control"] = "public, max-age=300"
+
+        # revalidation: hash the body into an ETag and answer a matching
+        # If-None-Match with an empty 304 instead of resending the JSON
+        if (
+            path.startswith(("/api/prices", "/api/history"))
+            and resp.status_code == 200
+            and not resp.direct_passthrough
+        ):
+            resp.set_etag(hashlib.blake2b(resp.get_data(), digest_size=16).hexdigest())
+            resp.make_conditional(request)
     except Exception:
         pass
 
     return resp
 
+# gzip/brotli for JSON. after_request hooks run in reverse registration order,
+# so registering this after _after_any_response compresses first and the ETag
+# above is taken over the encoded bytes (one tag per encoding, 304s still match).
+app.config["COMPRESS_MIMETYPES"] = ["application/json"]
+app.config["COMPRESS_LEVEL"] = 5
+app.config["COMPRESS_BR_LEVEL"] = 4
+# below one TCP segment (~1460B MSS) compressing can't save a packet or a round
+# trip, only CPU: errors, holdings/alerts lists and 30-day portfolio history go out
+# as-is; whatif/dca/forecast series (7-18KB raw, ~2.4x smaller gzipped) don't
+app.config["COMPRESS_MIN_SIZE"] = 1400
+Compress(app)
+
 # Run schema creation on the first HTTP request to this worker.
 # This prevents the app from crashing during import if the DB is temporarily down.
 SCHEMA_INITIALIZED = False
@@ -216,16 +414,9 @@ def session_init():
 # ---- HOLDINGS ----
 @app.route("/api/holdings", methods=["GET"])
 def list_holdings():
-    sql = (
-    "SELECT id, coin, amount, buy_price as \"buyPrice\", ccy, created_at "
-    "FROM holdings WHERE user_id=%s ORDER BY created_at DESC"
-    if DB_URL else
-    "SELECT id, coin, amount, buy_price as buyPrice, ccy, created_at "
-    "FROM holdings WHERE user_id=? ORDER BY created_at DESC"
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (g.uid,))
+            c.execute(SQL["list_holdings"], (g.uid,))
             rows = c.fetchall()
     return jsonify([_row_to_dict(r) for r in rows])
 
@@ -245,19 +436,19 @@ def api_portfolio_history():
         return jsonify({"error": "Bad params"}), 400
 
     # load user holdings
-    sql = (
-        "SELECT coin, amount FROM holdings WHERE user_id=%s"
-        if DB_URL else
-        "SELECT coin, amount FROM holdings WHERE user_id=?"
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (g.uid,))
+            c.execute(SQL["holding_amounts"], (g.uid,))
             rows = c.fetchall()
 
     if not rows:
         return jsonify({"series": []})
 
+    coins = sorted({r["coin"] for r in rows if float(r["amount"] or 0) > 0})
+    if not coins:
+        return jsonify({"series": []})
+    dailies = _daily_closes_for(coins, days)  # [[ts_ms, price], ...] one per day
+
     # build per-day USD value for each coin and sum
     agg = {}  # ts_ms -> total value
     for r in rows:
@@ -266,17 +457,16 @@ def api_portfolio_history():
         if qty <= 0:
             continue
 
-        daily = get_daily_closes(coin, days)  # [[ts_ms, price], ...] one per day
-        for ts, px in daily:
+        for ts, px in dailies[coin]:
             agg[ts] = agg.get(ts, 0.0) + qty * float(px)
 
     series = sorted([[ts, v] for ts, v in agg.items()], key=lambda x: x[0])
-    return jsonify({"series": series})
+    return jsonify_fast({"series": series})
 
 
 @app.route("/api/holdings", methods=["POST"])
 def upsert_holding():
-    data = request.get_json(silent=True) or {}
+    data = _json_body() or {}
 
     # accept both naming styles
     coin = (data.get("coin") or data.get("coin_id") or "").lower().strip()
@@ -293,74 +483,43 @@ def upsert_holding():
         return jsonify({"error": "Invalid holding."}), 400
 
     now = int(time.time())
-    sql = (
-        """
-        INSERT INTO holdings (id, user_id, coin, amount, buy_price, created_at, ccy)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (id) DO UPDATE
-          SET coin=excluded.coin,
-              amount=excluded.amount,
-              buy_price=excluded.buy_price,
-              ccy=excluded.ccy
-        """
-        if DB_URL else
-        """
-        INSERT INTO holdings (id, user_id, coin, amount, buy_price, created_at, ccy)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE
-          SET coin=excluded.coin,
-              amount=excluded.amount,
-              buy_price=excluded.buy_price,
-              ccy=excluded.ccy
-        """
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (hid, g.uid, coin, amount, buy, now, ccy))
+            c.execute(SQL["upsert_holding"], (hid, g.uid, coin, amount, buy, now, ccy))
+            row = c.fetchone()  # RETURNING: the stored row, no second query
         conn.commit()
+    if row is None:  # id belongs to another user: the WHERE left their row alone
+        return jsonify({"error": "Holding not found"}), 404
+    _invalidate_portfolio(g.uid)
 
     # ✅ return the saved row in the same shape list_holdings() uses (buyPrice camelCase)
-    return jsonify({
-        "id": hid,
-        "coin": coin,
-        "amount": amount,
-        "buyPrice": buy,
-        "ccy": ccy,
-        "created_at": now
-    })
+    return jsonify(_row_to_dict(row))
 
 @app.route("/api/holdings/<hid>", methods=["DELETE"])
 def delete_holding(hid):
-    sql = (
-    "DELETE FROM holdings WHERE id=%s AND user_id=%s"
-    if DB_URL else
-    "DELETE FROM holdings WHERE id=? AND user_id=?"
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (hid, g.uid))
+            c.execute(SQL["delete_holding"], (hid, g.uid))
         conn.commit()
+    _invalidate_portfolio(g.uid)
     return jsonify({"ok": True})
 
 
 # ---- ALERTS ----
 @app.route("/api/alerts", methods=["GET"])
 def list_alerts():
-    sql = (
-    "SELECT id, coin, op, value, ccy, created_at FROM alerts WHERE user_id=%s ORDER BY created_at DESC"
-    if DB_URL else
-    "SELECT id, coin, op, value, ccy, created_at FROM alerts WHERE user_id=? ORDER BY created_at DESC"
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (g.uid,))
+            c.execute(SQL["list_alerts"], (g.uid,))
             rows = c.fetchall()
     return jsonify([_row_to_dict(r) for r in rows])
 
 
 @app.route("/api/alerts", methods=["POST"])
 def upsert_alert():
-    data = request.get_json(force=True) or {}
+    data = _json_body()
+    if data is None:
+        return jsonify({"error": "Invalid JSON."}), 400
     aid = data.get("id") or ("a_" + secrets.token_urlsafe(12))
     coin = str(data.get("coin", "")).lower()
     op = data.get("op")
@@ -372,44 +531,21 @@ def upsert_alert():
     if not coin or op not in ("gte", "lte") or val <= 0:
         return jsonify({"error": "Invalid alert."}), 400
     now = int(time.time())
-    sql = (
-    """
-    INSERT INTO alerts (id, user_id, coin, op, value, created_at, ccy)
-    VALUES (%s, %s, %s, %s, %s, %s, %s)
-    ON CONFLICT (id) DO UPDATE
-      SET coin=excluded.coin,
-          op=excluded.op,
-          value=excluded.value,
-          ccy=excluded.ccy
-    """
-    if DB_URL else
-    """
-    INSERT INTO alerts (id, user_id, coin, op, value, created_at, ccy)
-    VALUES (?, ?, ?, ?, ?, ?, ?)
-    ON CONFLICT(id) DO UPDATE
-      SET coin=excluded.coin,
-          op=excluded.op,
-          value=excluded.value,
-          ccy=excluded.ccy
-    """
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (aid, g.uid, coin, op, val, now, ccy))
+            c.execute(SQL["upsert_alert"], (aid, g.uid, coin, op, val, now, ccy))
+            row = c.fetchone()
         conn.commit()
-    return jsonify({"id": aid, "coin": coin, "op": op, "value": val, "ccy": ccy})
+    if row is None:  # id belongs to another user
+        return jsonify({"error": "Alert not found"}), 404
+    return jsonify(_row_to_dict(row))
 
 
 @app.route("/api/alerts/<aid>", methods=["DELETE"])
 def delete_alert(aid):
-    sql = (
-    "DELETE FROM alerts WHERE id=%s AND user_id=%s"
-    if DB_URL else
-    "DELETE FROM alerts WHERE id=? AND user_id=?"
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (aid, g.uid))
+            c.execute(SQL["delete_alert"], (aid, g.uid))
         conn.commit()
     return jsonify({"ok": True})
 
@@ -417,14 +553,9 @@ def delete_alert(aid):
 # ---- GOAL ----
 @app.route("/api/goal", methods=["GET"])
 def get_goal():
-    sql = (
-    "SELECT amount, date, ccy FROM goals WHERE user_id=%s"
-    if DB_URL else
-    "SELECT amount, date, ccy FROM goals WHERE user_id=?"
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (g.uid,))
+            c.execute(SQL["get_goal"], (g.uid,))
             row = c.fetchone()
     if row:
         return jsonify(
@@ -435,35 +566,18 @@ def get_goal():
 
 @app.route("/api/goal", methods=["PUT"])
 def put_goal():
-    data = request.get_json(force=True) or {}
+    data = _json_body()
+    if data is None:
+        return jsonify({"error": "Invalid JSON."}), 400
     try:
         amount = float(data.get("amount", 0) or 0)
     except Exception:
         return jsonify({"error": "Invalid amount."}), 400
     date = str(data.get("date", "") or "")
     ccy = str(data.get("ccy", "USD")).upper()
-    sql = (
-    """
-    INSERT INTO goals (user_id, amount, date, ccy)
-    VALUES (%s, %s, %s, %s)
-    ON CONFLICT (user_id) DO UPDATE
-      SET amount=excluded.amount,
-          date=excluded.date,
-          ccy=excluded.ccy
-    """
-    if DB_URL else
-    """
-    INSERT INTO goals (user_id, amount, date, ccy)
-    VALUES (?, ?, ?, ?)
-    ON CONFLICT(user_id) DO UPDATE
-      SET amount=excluded.amount,
-          date=excluded.date,
-          ccy=excluded.ccy
-    """
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (g.uid, amount, date, ccy))
+            c.execute(SQL["put_goal"], (g.uid, amount, date, ccy))
         conn.commit()
     return jsonify({"amount": amount, "date": date, "ccy": ccy})
 
@@ -473,17 +587,57 @@ def me():
     return jsonify({"uid": getattr(g, "uid", None)})
 
 
-# Ensure VADER exists
-try:
-    nltk.data.find("sentiment/vader_lexicon")
-except LookupError:
-    nltk.download("vader_lexicon", quiet=True)
+# VADER is loaded lazily: the lexicon check (and download on a cold install)
+# no longer blocks worker start-up, and the analyzer is built once per process.
+SIA = None
+_SIA_LOCK = threading.Lock()
+
+
+def _ensure_vader():
+    try:
+        nltk.data.find("sentiment/vader_lexicon")
+    except LookupError:
+        nltk.download("vader_lexicon", quiet=True)
+
+
+def get_sia():
+    global SIA
+    if SIA is None:
+        with _SIA_LOCK:
+            if SIA is None:
+                _ensure_vader()
+                SIA = SentimentIntensityAnalyzer()
+    return SIA
+
+
+# headlines repeat across polls of the same coin; score each one once
+_TITLE_SCORES = TTLCache(maxsize=2048, ttl=900)  # title -> VADER compound
+_TITLE_LOCK = threading.Lock()
+
+
+def _compound_scores(titles):
+    """Full VADER compound score per title, memoized per title string."""
+    with _TITLE_LOCK:
+        scores = [_TITLE_SCORES.get(t) for t in titles]
+    missing = [i for i, sc in enumerate(scores) if sc is None]
+    if missing:
+        polarity = get_sia().polarity_scores
+        for i in missing:
+            scores[i] = polarity(titles[i])["compound"]
+        with _TITLE_LOCK:
+            for i in missing:
+                _TITLE_SCORES[titles[i]] = scores[i]
+    return scores
 
 UA = {"User-Agent": "crypto-dashboard/1.0 (learning project)"}
 CG_KEY = os.getenv("CG_KEY")  # optional: demo/pro key
 
 
 # ---------- single session + gentle retry ----------
+HTTP_POOL_HOSTS = 20    # distinct hosts kept pooled (CG, CC, FX, reddit, HN, ...)
+HTTP_POOL_MAXSIZE = 50  # connections kept per host
+
+
 def _build_session():
     s = requests.Session()
     retry = Retry(
@@ -495,7 +649,13 @@ def _build_session():
         status_forcelist=(429, 500, 502, 503, 504),
         allowed_methods=("GET",),
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    # bigger pools so concurrent fan-out (portfolio endpoints) reuses warm
+    # keep-alive connections instead of opening and discarding extra ones
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=HTTP_POOL_HOSTS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+    )
     s.mount("https://", adapter)
     s.mount("http://", adapter)
 
@@ -510,21 +670,200 @@ def _build_session():
 
 SESSION = _build_session()
 
+CG_BASE = "https://api.coingecko.com/api/v3"
+CONNECT_TIMEOUT = 5  # s; an unreachable host fails fast instead of using the read budget
+
+
+def cg_get(path: str, params=None, read_timeout: float = 12):
+    """GET {CG_BASE}{path} on the shared pooled/retrying session; returns the Response."""
+    return SESSION.get(CG_BASE + path, params=params, timeout=(CONNECT_TIMEOUT, read_timeout))
+
+# shared threads for overlapping independent upstream calls. Tasks submitted here
+# must not submit to IO_POOL themselves (a full pool would deadlock waiting on them).
+IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="io")
+
 # ---------- tiny in-memory caches ----------
-PRICES_CACHE = {"t": 0.0, "data": None}  # 60s TTL
+PRICES_CACHE = OrderedDict()  # url -> (ts, data), least recently used first; 60s TTL
 PRICES_TTL = 60
+PRICES_CACHE_MAX = 128
+_PRICES_LOCK = threading.Lock()
 
-HIST_CACHE = {}  # key: (coin, days) -> {"t": ts, "data": {...}}
 HIST_TTL = 600  # 10 minutes
+HIST_CACHE = TTLCache(maxsize=512, ttl=HIST_TTL)  # (coin, days) -> {"t": ts, "data": {...}}
 
 # big series cache: /market_chart?days=max per coin (24h TTL)
-FULL_SERIES_CACHE = {}  # coin_id -> {"t": ts, "data": [[ts_ms, price], ...]}
 FULL_SERIES_TTL = 24 * 3600
+FULL_SERIES_CACHE = TTLCache(maxsize=256, ttl=FULL_SERIES_TTL)  # coin_id -> {"t": ts, "data": [...]}
+
+# TTLCache reorders/expires on every access, so reads need the lock too
+_HIST_LOCK = threading.RLock()
 
 # cache for big "days" fetches (optional but nice)
 _SERIES_DAYS_CACHE = {}
 _SERIES_DAYS_TTL = 24 * 3600  # 24h
 
+# resampled daily closes shared by every endpoint (same freshness as history)
+_DAILY_CACHE = TTLCache(maxsize=1024, ttl=HIST_TTL)  # (coin_id, lookback_days) -> {"t": ts, "data": [[ts_ms, px], ...]}
+# GBM calibration of those closes; valid while _DAILY_CACHE serves the same list
+_CALIB_CACHE = TTLCache(maxsize=1024, ttl=HIST_TTL)  # (coin_id, lookback_days) -> {"src": daily, ...}
+
+# finished /api/portfolio_forecast payloads: (uid, holdings snapshot, h) -> response dict
+_PF_CACHE = TTLCache(maxsize=256, ttl=600)
+_PF_LOCK = threading.Lock()
+
+
+# CoinGecko range/series lookups, keyed by hour-bucketed window: repeat asks for the
+# same coin within a few minutes share one upstream fetch (and its rate-limit budget)
+CG_TTL = 180
+_CG_CACHE = TTLCache(maxsize=512, ttl=CG_TTL)  # (kind, coin_id, from_h, to_h) -> CachedSeries
+_CG_LOCK = threading.Lock()
+
+# upstream fetches in progress: key -> {"done": Event, "data": result once set}
+_INFLIGHT = {}
+_INFLIGHT_LOCK = threading.Lock()
+INFLIGHT_WAIT = 10  # s a follower waits before giving up and fetching itself
+
+
+def _single_flight(key, fetch):
+    """
+    Run fetch() once per key across threads; callers arriving while it runs
+    block on the leader and share its result instead of repeating the call.
+    """
+    with _INFLIGHT_LOCK:
+        flight = _INFLIGHT.get(key)
+        leader = flight is None
+        if leader:
+            flight = _INFLIGHT[key] = {"done": threading.Event()}
+    if not leader:
+        if flight["done"].wait(INFLIGHT_WAIT) and "data" in flight:
+            return flight["data"]
+        return fetch()  # leader failed or is stuck; don't hang the request
+    try:
+        flight["data"] = fetch()
+        return flight["data"]
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+        flight["done"].set()
+
+
+@dataclass(frozen=True)
+class CachedSeries:
+    """
+    A fetched [[ts_ms, px], ...] series plus the same points packed once into
+    arrays, so handlers search ts_arr/px_arr and keep raw_list for JSON only.
+    Shared between requests: treat every field as read-only.
+    """
+    raw_list: list
+    ts_arr: np.ndarray  # int64 ms, ascending
+    px_arr: np.ndarray  # float64 (nan where upstream sent no price)
+    limited_365: bool = False
+
+    @classmethod
+    def from_raw(cls, raw, limited_365: bool = False):
+        arr = np.asarray(raw, dtype=np.float64).reshape(-1, 2)
+        # contiguous columns: the jitted kernels would otherwise compile a strided variant
+        return cls(raw, arr[:, 0].astype(np.int64), np.ascontiguousarray(arr[:, 1]), limited_365)
+
+    def __len__(self):
+        return len(self.raw_list)
+
+    def bounds(self, from_ms: int, to_ms: int):
+        """(lo, hi) such that raw_list[lo:hi] holds every point with from_ms <= ts <= to_ms."""
+        lo = int(np.searchsorted(self.ts_arr, from_ms, side="left"))
+        hi = int(np.searchsorted(self.ts_arr, to_ms, side="right"))
+        return lo, hi
+
+
+def _cg_cached(key, fetch):
+    """Serve key from _CG_CACHE or call fetch() (single-flight); only non-empty results are kept."""
+    with _CG_LOCK:
+        hit = _CG_CACHE.get(key)
+    if hit is not None:
+        return hit
+
+    def load():
+        with _CG_LOCK:  # a flight may have published between our miss and now
+            hit = _CG_CACHE.get(key)
+        if hit is not None:
+            return hit
+        out = fetch()
+        if out:
+            with _CG_LOCK:  # publish before the flight ends so late callers hit it
+                _CG_CACHE[key] = out
+        return out
+
+    return _single_flight(key, load)
+
+
+def _invalidate_portfolio(uid):
+    """Drop a user's cached portfolio results (call after any holdings change)."""
+    with _PF_LOCK:
+        for key in [k for k in _PF_CACHE if k[0] == uid]:
+            _PF_CACHE.pop(key, None)
+
+
+# ---------- on-disk copy of the upstream caches ----------
+# HIST_CACHE / FULL_SERIES_CACHE are write-through to a small SQLite table so
+# a restarted worker starts warm instead of re-hitting CoinGecko (and its 429s).
+# its own file (gitignored), not DB_PATH: app.db is tracked and holds user data.
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "cache.db")
+_CACHE_CONN = None  # one shared connection: the table is small and writes serialize anyway
+_CACHE_LOCK = threading.Lock()  # guards _CACHE_CONN and every statement on it
+
+
+@contextmanager
+def _cache_db():
+    """The shared cache connection (opened on first use), held under _CACHE_LOCK."""
+    global _CACHE_CONN
+    with _CACHE_LOCK:
+        if _CACHE_CONN is None:
+            conn = sqlite3.connect(CACHE_DB_PATH, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, ts REAL NOT NULL, body BLOB NOT NULL)"
+            )
+            _CACHE_CONN = conn
+        yield _CACHE_CONN
+
+
+@atexit.register
+def _close_cache_db():
+    global _CACHE_CONN
+    with _CACHE_LOCK:
+        conn, _CACHE_CONN = _CACHE_CONN, None
+    if conn is not None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+def _cache_get(key: str):
+    """Persisted entry as {"t": ts, "data": ...} (any age), or None."""
+    try:
+        with _cache_db() as conn:
+            row = conn.execute("SELECT ts, body FROM cache WHERE key=?", (key,)).fetchone()
+        return {"t": row[0], "data": orjson.loads(row[1])} if row else None
+    except (sqlite3.Error, orjson.JSONDecodeError):
+        return None
+
+
+def _cache_put(key: str, entry):
+    try:
+        body = orjson.dumps(entry["data"])  # encode outside the lock
+        with _cache_db() as conn:
+            conn.execute(
+                "INSERT INTO cache (key, ts, body) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET ts=excluded.ts, body=excluded.body",
+                (key, entry["t"], body),
+            )
+            conn.commit()
+    except sqlite3.Error:
+        pass  # the in-memory copy is authoritative; disk is best-effort
+
 
 def _valid_history(j):
     return isinstance(j, dict) and isinstance(j.get("prices"), list)
@@ -533,29 +872,116 @@ def _valid_history(j):
 # ---------- cached simple/price ----------
 def cached_get_json(url: str, ttl: int):
     now = time.time()
+    with _PRICES_LOCK:
+        hit = PRICES_CACHE.get(url)
+        if hit is not None:
+            PRICES_CACHE.move_to_end(url)
+    stale = hit[1] if hit is not None else None
+
     # 1) serve recent cache
-    if PRICES_CACHE["data"] is not None and (now - PRICES_CACHE["t"] < ttl):
-        return PRICES_CACHE["data"]
+    if hit is not None and (now - hit[0] < ttl):
+        return stale
+
+    # 2) fetch fresh (fall back to stale if 429 or error); one fetch per url at a time
+    def load():
+        try:
+            r = SESSION.get(url, timeout=(CONNECT_TIMEOUT, 10))
+            if r.status_code == 429 and stale is not None:
+                return stale
+            data = r.json()
+            # JSON-wrapped 429 from CG
+            if (
+                isinstance(data, dict)
+                and data.get("status", {}).get("error_code") == 429
+                and stale is not None
+            ):
+                return stale
+            with _PRICES_LOCK:
+                PRICES_CACHE[url] = (now, data)
+                PRICES_CACHE.move_to_end(url)
+                while len(PRICES_CACHE) > PRICES_CACHE_MAX:
+                    PRICES_CACHE.popitem(last=False)
+            return data
+        except Exception:
+            # last resort: stale (or empty)
+            return stale or {}
+
+    return _single_flight(("url", url), load)
+
+
+# ---------- batched single-coin quotes ----------
+# /simple/price takes comma-separated ids, so concurrent one-coin lookups (the
+# /api/whatif fallback) wait up to QUOTE_WINDOW and go out as one request.
+QUOTE_TTL = 30
+QUOTE_WINDOW = 0.05  # s to collect a burst after its first ask
+QUOTE_BATCH_MAX = 25
+QUOTE_READ_TIMEOUT = 8  # s, same budget the per-request fallback had
+# a batch already ends within the session's own limits (3 tries x (5s connect +
+# 8s read) + retry backoff); this is only a backstop, so no caller gives up on a
+# quote the old single request would still have returned
+QUOTE_WAIT = 45
+_QUOTE_CACHE = TTLCache(maxsize=256, ttl=QUOTE_TTL)  # coin_id -> usd price
+_QUOTE_LOCK = threading.Lock()
+_QUOTE_Q = queue.Queue()  # (coin_id, Future)
+
+
+def quote_usd(coin_id: str) -> Future:
+    """Future resolving to coin_id's USD price (None if CoinGecko had none)."""
+    with _QUOTE_LOCK:
+        px = _QUOTE_CACHE.get(coin_id)
+    fut = Future()
+    if px is not None:
+        fut.set_result(px)
+    else:
+        _QUOTE_Q.put((coin_id, fut))
+    return fut
+
+
+def _quote_dispatcher():
+    while True:
+        batch = [_QUOTE_Q.get()]  # sleep until someone asks
+        deadline = time.monotonic() + QUOTE_WINDOW
+        while len(batch) < QUOTE_BATCH_MAX:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                break
+            try:
+                batch.append(_QUOTE_Q.get(timeout=left))
+            except queue.Empty:
+                break
+
+        # fetch off this thread: a slow/retried batch must not hold up the next one
+        IO_POOL.submit(_quote_batch, batch)
 
-    # 2) fetch fresh (fall back to stale if 429 or error)
+
+def _quote_batch(batch):
+    """One /simple/price call for a burst of (coin_id, Future); resolves every Future."""
+    ids = sorted({c for c, _ in batch})
+    prices = {}
     try:
-        r = SESSION.get(url, timeout=10)
-        if r.status_code == 429 and PRICES_CACHE["data"] is not None:
-            return PRICES_CACHE["data"]
+        r = cg_get(
+            "/simple/price",
+            {"ids": ",".join(ids), "vs_currencies": "usd"},
+            read_timeout=QUOTE_READ_TIMEOUT,
+        )
         data = r.json()
-        # JSON-wrapped 429 from CG
-        if (
-            isinstance(data, dict)
-            and data.get("status", {}).get("error_code") == 429
-            and PRICES_CACHE["data"] is not None
-        ):
-            return PRICES_CACHE["data"]
-        PRICES_CACHE["t"] = now
-        PRICES_CACHE["data"] = data
-        return data
+        for c in ids:
+            q = data.get(c) if isinstance(data, dict) else None
+            try:
+                prices[c] = float(q["usd"])
+            except Exception:
+                pass
+        with _QUOTE_LOCK:
+            _QUOTE_CACHE.update(prices)
     except Exception:
-        # last resort: stale (or empty)
-        return PRICES_CACHE["data"] or {}
+        pass  # unresolved coins get None below
+    finally:
+        for c, fut in batch:
+            fut.set_result(prices.get(c))
+
+
+if not _IN_POOL_CHILD:
+    threading.Thread(target=_quote_dispatcher, name="quote-batch", daemon=True).start()
 
 
 # ---------- cached market_chart ----------
@@ -564,13 +990,24 @@ INTERVAL_FOR = {"1": "hourly", "7": "hourly", "30": "daily"}
 
 def fetch_history_cached(coin_id: str, days: str):
     key = (coin_id, str(days))
+    disk_key = f"hist:{coin_id}:{days}"
     now = time.time()
 
+    with _HIST_LOCK:
+        entry = HIST_CACHE.get(key)
+
+    # 0) cold worker / evicted: adopt the persisted copy (keeps its age, so TTL/stale still apply)
+    if entry is None:
+        entry = _cache_get(disk_key)
+        if entry:
+            with _HIST_LOCK:
+                HIST_CACHE[key] = entry
+
     # 1) serve recent cache
-    if key in HIST_CACHE and (now - HIST_CACHE[key]["t"] < HIST_TTL):
-        return HIST_CACHE[key]["data"]
+    if entry and (now - entry["t"] < HIST_TTL):
+        return entry["data"]
 
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
+    path = f"/coins/{coin_id}/market_chart"
     params = {
         "vs_currency": "usd",
         "days": days,
@@ -579,19 +1016,22 @@ def fetch_history_cached(coin_id: str, days: str):
 
     def hit(p):
         try:
-            r = SESSION.get(url, params=p, timeout=12)
+            r = cg_get(path, p)
             try:
                 j = r.json()
             except Exception:
                 j = {}
-            # debug when empty
-            if not isinstance(j, dict) or not j.get("prices"):
-                print(
-                    f"[history debug] coin={coin_id} days={days} status={r.status_code} len={len(r.text)} params={p}"
+            # debug when empty (len(content) avoids decoding the body to str)
+            if (not isinstance(j, dict) or not j.get("prices")) and app.logger.isEnabledFor(
+                logging.DEBUG
+            ):
+                app.logger.debug(
+                    "[history] empty coin=%s days=%s status=%s len=%d params=%s",
+                    coin_id, days, r.status_code, len(r.content), p,
                 )
             return r.status_code, j
         except Exception as e:
-            print(f"[history debug] exception coin={coin_id} days={days}: {e}")
+            app.logger.debug("[history] exception coin=%s days=%s: %s", coin_id, days, e)
             return None, {}
 
     # 2) try with interval, then relax if limited/empty
@@ -602,18 +1042,24 @@ def fetch_history_cached(coin_id: str, days: str):
     empty = not _valid_history(j) or not j.get("prices")
 
     if not limited and not empty:
-        HIST_CACHE[key] = {"t": time.time(), "data": j}
+        fresh = {"t": time.time(), "data": j}
+        with _HIST_LOCK:
+            HIST_CACHE[key] = fresh
+        _cache_put(disk_key, fresh)
         return j
 
     # 3) retry once without interval (some CG modes prefer default)
     status, j = hit({"vs_currency": "usd", "days": days})
     if _valid_history(j) and j.get("prices"):
-        HIST_CACHE[key] = {"t": time.time(), "data": j}
+        fresh = {"t": time.time(), "data": j}
+        with _HIST_LOCK:
+            HIST_CACHE[key] = fresh
+        _cache_put(disk_key, fresh)
         return j
 
     # 4) last resort: serve stale if we have anything
-    if key in HIST_CACHE:
-        return HIST_CACHE[key]["data"]
+    if entry:
+        return entry["data"]
 
     return {"prices": []}
 
@@ -623,6 +1069,7 @@ def fetch_history_cached(coin_id: str, days: str):
 # ---- FX (USD base) ----
 FX_CACHE = {"t": 0.0, "data": {"USD": 1.0}}
 FX_TTL = 3600  # 1 hour
+FX_RETRY = 300  # retry sooner when every provider failed
 
 _WANTED = ("EUR", "GBP", "INR", "JPY")
 
@@ -644,12 +1091,8 @@ def _normalize_rates(d):
     return out
 
 
-@app.route("/api/fx")
-def fx_rates():
-    now = time.time()
-    if now - FX_CACHE["t"] < FX_TTL and FX_CACHE["data"]:
-        return jsonify(FX_CACHE["data"])
-
+def _fetch_fx_rates():
+    """USD-based rates from the first provider that answers; None if all fail."""
     # 1) exchangerate.host
     try:
         r = SESSION.get(
@@ -660,9 +1103,7 @@ def fx_rates():
         j = r.json() if r.headers.get("content-type", "").startswith("application/json") else {}
         rates = _normalize_rates(j.get("rates"))
         if len(rates) > 1:  # we have more than USD
-            FX_CACHE["t"] = now
-            FX_CACHE["data"] = rates
-            return jsonify(rates)
+            return rates
     except Exception:
         pass
 
@@ -676,9 +1117,7 @@ def fx_rates():
         # keep only wanted + USD
         rates = {"USD": 1.0, **{k: rates[k] for k in _WANTED if k in rates}}
         if len(rates) > 1:
-            FX_CACHE["t"] = now
-            FX_CACHE["data"] = rates
-            return jsonify(rates)
+            return rates
     except Exception:
         pass
 
@@ -692,19 +1131,36 @@ def fx_rates():
         rates = _normalize_rates(j.get("rates"))
         rates = {"USD": 1.0, **{k: rates[k] for k in _WANTED if k in rates}}
         if len(rates) > 1:
-            FX_CACHE["t"] = now
-            FX_CACHE["data"] = rates
-            return jsonify(rates)
+            return rates
     except Exception:
         pass
 
-    # last resort: whatever we had (likely {"USD":1.0})
+    return None
+
+
+def _fx_refresher():
+    # refresh off the request path: now, then every FX_TTL (sooner after a miss)
+    while True:
+        rates = _fetch_fx_rates()
+        if rates:
+            FX_CACHE["t"] = time.time()
+            FX_CACHE["data"] = rates  # single assignment: readers never see a partial dict
+        time.sleep(FX_TTL if rates else FX_RETRY)
+
+
+if not _IN_POOL_CHILD:
+    threading.Thread(target=_fx_refresher, name="fx-refresh", daemon=True).start()
+
+
+@app.route("/api/fx")
+def fx_rates():
+    # last successful refresh (or {"USD": 1.0} until the first one lands)
     return jsonify(FX_CACHE["data"])
 
 
 @app.route("/api/prices")
 def get_prices():
-    url = "https://api.coingecko.com/api/v3/simple/price?ids=bitcoin,ethereum,dogecoin&vs_currencies=usd"
+    url = f"{CG_BASE}/simple/price?ids=bitcoin,ethereum,dogecoin&vs_currencies=usd"
     data = cached_get_json(url, ttl=PRICES_TTL)
     return jsonify(data if isinstance(data, dict) else {})
 
@@ -714,7 +1170,7 @@ def get_history(coin_id, days):
     data = fetch_history_cached(coin_id, days)
     if not isinstance(data, dict) or "prices" not in data:
         data = {"prices": []}
-    return jsonify(data)
+    return jsonify_fast(data)
 
 
 @app.route("/api/forecast/<coin_id>")
@@ -738,7 +1194,7 @@ def api_forecast(coin_id):
     if not f:
         return jsonify({"error": "Not enough data for forecast"}), 422
 
-    return jsonify(
+    return jsonify_fast(
         {
             "coin": coin_id,
             "h": h,
@@ -770,10 +1226,11 @@ def api_scenario(coin_id):
     bands = gbm_scenarios(
         daily, horizon_days=int(years * 365), step_days=step_days, n_paths=n_paths
     )
-    if not bands["p50"]:
+    if not bands["p50"].size:
         return jsonify({"error": "Not enough data for scenarios"}), 422
 
-    return jsonify({"coin": coin_id, "years": years, "step_days": step_days, **bands})
+    pairs = {k: series_pairs(bands["ts"], bands[k]) for k in ("p10", "p50", "p90")}
+    return jsonify_fast({"coin": coin_id, "years": years, "step_days": step_days, **pairs})
 
 
 @app.route("/api/whatif_predict")
@@ -809,7 +1266,7 @@ def api_whatif_predict():
     fut_lo = [[ts, max(0.0, px * shares)] for ts, px in lo]
     fut_hi = [[ts, max(0.0, px * shares)] for ts, px in hi]
 
-    return jsonify(
+    return jsonify_fast(
         {
             "coin": coin_id,
             "amount": amount,
@@ -849,52 +1306,48 @@ def api_dca_predict():
     if not f:
         return jsonify({"error": "Forecast failed"}), 422
 
-    # index future closes by day timestamp for quick lookup
-    fut_map = {_to_midnight_utc(int(ts / 1000)) * 1000: px for ts, px in f}
-    low_map = {_to_midnight_utc(int(ts / 1000)) * 1000: px for ts, px in lo}
-    high_map = {_to_midnight_utc(int(ts / 1000)) * 1000: px for ts, px in hi}
+    # one pass over the forecast: sorted day keys + (central, low, high) rows
+    keys = np.array([_to_midnight_utc(int(ts / 1000)) * 1000 for ts, _ in f], dtype=np.int64)
+    vals = np.array(
+        [(pf, pl, ph) for (_, pf), (_, pl), (_, ph) in zip(f, lo, hi)], dtype=np.float64
+    )
 
     # schedule future contributions starting tomorrow (aligned to step boundary)
     today_ms = int(daily[-1][0])
-    first_ms = today_ms + step_days * ONE_DAY * 1000
-
-    shares = 0.0
-    invested = 0.0
-
-    value_series = []
-    low_series = []  # portfolio low path (CI)
-    high_series = []  # portfolio high path (CI)
-
-    cursor = first_ms
+    step_ms = step_days * ONE_DAY * 1000
     end_ms = today_ms + horizon_days * ONE_DAY * 1000
-
-    while cursor <= end_ms:
-        key = _to_midnight_utc(int(cursor / 1000)) * 1000
-        px = fut_map.get(key)
-
-        # buy at central forecast price
-        if px and px > 0:
-            shares += amt_per / px
-            invested += amt_per
-
-        # central value on this day
-        central_px = px if px else (fut_map.get(min(fut_map.keys())) if fut_map else 0)
-        value_series.append([cursor, central_px * shares])
-
-        # CI values (same shares * low/high forecast)
-        if key in low_map:
-            low_series.append([cursor, max(0.0, low_map[key] * shares)])
-        if key in high_map:
-            high_series.append([cursor, max(0.0, high_map[key] * shares)])
-
-        cursor += step_days * ONE_DAY * 1000
+    cursors = np.arange(today_ms + step_ms, end_ms + 1, step_ms, dtype=np.int64)
+
+    # look every contribution day up in the forecast at once
+    day_keys = (cursors // (ONE_DAY * 1000)) * (ONE_DAY * 1000)
+    idx = np.minimum(np.searchsorted(keys, day_keys), len(keys) - 1)
+    found = keys[idx] == day_keys
+    px = np.where(found, vals[idx, 0], 0.0)
+
+    # buy at central forecast price
+    buys = found & (px > 0)
+    shares_at = np.cumsum(np.where(buys, amt_per / np.where(buys, px, 1.0), 0.0))
+    shares = float(shares_at[-1]) if shares_at.size else 0.0
+    invested = float(amt_per * buys.sum())
+
+    # central value on each day (fall back to the first forecast close on gaps)
+    central_px = np.where(px != 0, px, vals[0, 0])
+    ts_list = cursors.tolist()
+    value_series = [[t, v] for t, v in zip(ts_list, (central_px * shares_at).tolist())]
+
+    # CI values (same shares * low/high forecast), only on forecast days
+    low_v = np.maximum(0.0, vals[idx, 1] * shares_at).tolist()
+    high_v = np.maximum(0.0, vals[idx, 2] * shares_at).tolist()
+    hit = found.tolist()
+    low_series = [[t, v] for t, v, ok in zip(ts_list, low_v, hit) if ok]  # portfolio low path
+    high_series = [[t, v] for t, v, ok in zip(ts_list, high_v, hit) if ok]  # portfolio high path
 
     # horizon snapshot
     final_px = f[-1][1]
     current_value = shares * final_px if final_px > 0 else 0.0
     roi_pct = ((current_value - invested) / invested * 100.0) if invested > 0 else 0.0
 
-    return jsonify(
+    return jsonify_fast(
         {
             "coin": coin_id,
             "freq": freq,
@@ -927,25 +1380,14 @@ def api_whatif_scenario():
     except Exception:
         return jsonify({"error": "Bad params"}), 400
 
-    daily = get_daily_closes(coin_id, 365)
-    if not daily or len(daily) < 30:
+    cal = get_calibration(coin_id, 365)
+    if cal["days"] < 30:
         return jsonify({"error": "Not enough history"}), 422
-
-    closes = [float(p[1]) for p in daily][-365:]
-    rets = []
-    for i in range(1, len(closes)):
-        p0, p1 = closes[i-1], closes[i]
-        if p0 > 0 and p1 > 0:
-            rets.append(math.log(p1/p0))
-    if len(rets) < 10:
+    if cal["n_rets"] < 10:
         return jsonify({"error": "Not enough returns"}), 422
 
-    mu = sum(rets)/len(rets)
-    var = sum((r - mu)**2 for r in rets) / max(len(rets)-1, 1)
-    sigma = math.sqrt(max(var, 1e-12))
-
-    last_px = closes[-1]
-    last_ts = int(daily[-1][0])
+    mu, sigma = cal["mu"], cal["sigma"]
+    last_px, last_ts = cal["last_px"], cal["last_ts"]
     if last_px <= 0:
         return jsonify({"error": "Bad current price"}), 422
 
@@ -953,29 +1395,12 @@ def api_whatif_scenario():
     horizon_days = int(years * 365)
     steps = max(1, int(horizon_days / step_days))
 
-    all_values = [[] for _ in range(steps)]
-    for _ in range(n_paths):
-        px = last_px
-        for s in range(steps):
-            z = random.gauss(0.0, 1.0)
-            drift = (mu - 0.5 * sigma * sigma) * step_days
-            shock = sigma * math.sqrt(step_days) * z
-            px = max(px * math.exp(drift + shock), 0.0)
-            all_values[s].append(shares * px)
-
-    p10, p50, p90 = [], [], []
-    ts = last_ts
-    for s in range(steps):
-        ts += step_days * ONE_DAY * 1000
-        vec = sorted(all_values[s])
-        i10 = int(0.10 * (len(vec) - 1))
-        i50 = int(0.50 * (len(vec) - 1))
-        i90 = int(0.90 * (len(vec) - 1))
-        p10.append([ts, float(vec[i10])])
-        p50.append([ts, float(vec[i50])])
-        p90.append([ts, float(vec[i90])])
-
-    return jsonify({
+    paths = simulate_gbm_paths(last_px, mu, sigma, step_days, steps, n_paths)
+    values = shares * paths  # (n_paths, steps)
+
+    p10, p50, p90 = percentile_bands(values, last_ts, step_days)
+
+    return jsonify_fast({
         "coin": coin_id, "amount": amount, "years": years,
         "step_days": step_days, "n": n_paths,
         "current_price": last_px, "shares": shares,
@@ -1016,69 +1441,24 @@ def api_dca_scenario():
     steps = max(1, int(horizon_days / step_days))
 
     # calibrate GBM from last ~year of daily closes
-    daily = get_daily_closes(coin_id, 365)
-    if not daily or len(daily) < 30:
+    cal = get_calibration(coin_id, 365)
+    if cal["days"] < 30:
         return jsonify({"error": "Not enough history"}), 422
-
-    closes = [float(p[1]) for p in daily][-365:]
-    rets = []
-    for i in range(1, len(closes)):
-        p0, p1 = closes[i - 1], closes[i]
-        if p0 > 0 and p1 > 0:
-            rets.append(math.log(p1 / p0))
-    if len(rets) < 10:
+    if cal["n_rets"] < 10:
         return jsonify({"error": "Not enough returns"}), 422
 
-    mu = sum(rets) / len(rets)                         # daily drift
-    var = sum((r - mu) ** 2 for r in rets) / max(len(rets) - 1, 1)
-    sigma = math.sqrt(max(var, 1e-12))                 # daily vol
-
-    last_px = closes[-1]
-    last_ts = int(daily[-1][0])
+    mu, sigma = cal["mu"], cal["sigma"]                # daily drift / vol
+    last_px, last_ts = cal["last_px"], cal["last_ts"]
 
     # simulate VALUE paths (prices + scheduled buys accumulate shares)
-    all_values = [[] for _ in range(steps)]            # collect values at each step across paths
-
-    for _ in range(n_paths):
-        px = last_px
-        ts = last_ts
-        shares = 0.0
-        invested = 0.0
-
-        for s in range(steps):
-            # GBM step aggregated to step_days
-            z = random.gauss(0.0, 1.0)
-            drift = (mu - 0.5 * sigma * sigma) * step_days
-            shock = sigma * math.sqrt(step_days) * z
-            px = max(px * math.exp(drift + shock), 0.0)
-            ts += step_days * ONE_DAY * 1000
-
-            # buy at the step price
-            if px > 0:
-                shares += amt_per / px
-                invested += amt_per
-
-            value = shares * px
-            all_values[s].append(value)
+    values = simulate_dca(mu, sigma, step_days, n_paths, steps, last_px, amt_per)
 
     # percentile bands per step
-    p10, p50, p90 = [], [], []
-    ts = last_ts
-    for s in range(steps):
-        ts += step_days * ONE_DAY * 1000
-        vec = sorted(all_values[s])
-        if not vec:
-            continue
-        i10 = int(0.10 * (len(vec) - 1))
-        i50 = int(0.50 * (len(vec) - 1))
-        i90 = int(0.90 * (len(vec) - 1))
-        p10.append([ts, float(vec[i10])])
-        p50.append([ts, float(vec[i50])])
-        p90.append([ts, float(vec[i90])])
+    p10, p50, p90 = percentile_bands(values, last_ts, step_days)
 
     invested_total = amt_per * steps  # schedule is deterministic per path (one buy each step)
 
-    return jsonify({
+    return jsonify_fast({
         "coin": coin_id,
         "freq": freq,
         "amount_per": amt_per,
@@ -1097,18 +1477,15 @@ def api_dca_scenario():
 def realized_volatility(prices):
     if not prices or len(prices) < 2:
         return {"annualized_vol": None, "returns": []}
-    prices = sorted(prices, key=lambda x: x[0])
-    rets = []
-    for i in range(1, len(prices)):
-        p0 = float(prices[i - 1][1])
-        p1 = float(prices[i][1])
-        if p0 <= 0 or p1 <= 0:
-            continue
-        rets.append(math.log(p1 / p0))
+    arr = np.asarray(prices, dtype=np.float64)
+    arr = arr[np.argsort(arr[:, 0], kind="stable")]
+    p0, p1 = arr[:-1, 1], arr[1:, 1]
+    ok = (p0 > 0) & (p1 > 0)  # skip any step touching a non-positive price
+    rets = np.log(p1[ok] / p0[ok])
     if len(rets) < 2:
         return {"annualized_vol": None, "returns": rets}
-    stdev = statistics.pstdev(rets)
-    total_hours = (prices[-1][0] - prices[0][0]) / (1000 * 60 * 60)
+    stdev = float(rets.std())  # population std, as statistics.pstdev
+    total_hours = (arr[-1, 0] - arr[0, 0]) / (1000 * 60 * 60)
     n_obs = len(rets)
     obs_per_day = n_obs / max(total_hours / 24.0, 1e-9)
     daily_vol = stdev * math.sqrt(max(obs_per_day, 1))
@@ -1142,6 +1519,9 @@ def fetch_hn_titles(coin):
         return []
 
 
+_ts_of = operator.itemgetter(0)  # bisect key for [[ts_ms, px], ...]
+
+
 def _nearest_price(prices, target_ms: int):
     """
     prices: [[ts_ms, price], ...] (asc)
@@ -1149,34 +1529,42 @@ def _nearest_price(prices, target_ms: int):
     """
     if not prices:
         return None
-    best = prices[0][1]
-    best_diff = abs(prices[0][0] - target_ms)
-    for ts, p in prices:
-        d = abs(ts - target_ms)
-        if d < best_diff:
-            best, best_diff = p, d
-    return float(best)
+    i = bisect.bisect_left(prices, target_ms, key=_ts_of)
+    if i == len(prices):
+        i -= 1
+    elif i > 0 and target_ms - prices[i - 1][0] <= prices[i][0] - target_ms:
+        i -= 1  # ties go to the earlier point
+    # first of any duplicate timestamps, as the linear scan did
+    i = bisect.bisect_left(prices, prices[i][0], hi=i, key=_ts_of)
+    return float(prices[i][1])
 
 
 def _first_at_or_after(prices, target_ms: int):
     """Return the price at the first timestamp >= target_ms; fallback to nearest."""
     if not prices:
         return None
-    for ts, px in prices:
-        if ts >= target_ms:
-            try:
-                return float(px)
-            except Exception:
-                return None
+    i = bisect.bisect_left(prices, target_ms, key=_ts_of)
+    if i < len(prices):
+        try:
+            return float(prices[i][1])
+        except Exception:
+            return None
     # all points are earlier; use nearest as a last resort
     return _nearest_price(prices, target_ms)
 
 
+def _clip_window(prices, from_ms: int, to_ms: int):
+    """Points with from_ms <= ts <= to_ms of an ascending [[ts_ms, px], ...] list (a slice)."""
+    lo = bisect.bisect_left(prices, from_ms, key=_ts_of)
+    hi = bisect.bisect_right(prices, to_ms, lo=lo, key=_ts_of)
+    return prices[lo:hi]
+
+
 def _to_midnight_utc(ts: int):
     """Clamp a unix seconds timestamp to midnight UTC (int seconds)."""
-    d = dt.datetime.fromtimestamp(ts, tz=dt.timezone.utc)
-    d = d.replace(hour=0, minute=0, second=0, microsecond=0)
-    return int(d.timestamp())
+    # unix time has no leap seconds, so UTC days are exact ONE_DAY multiples
+    ts = int(ts)
+    return ts - ts % ONE_DAY
 
 
 def _resample_to_daily(prices):
@@ -1186,25 +1574,123 @@ def _resample_to_daily(prices):
     """
     if not prices:
         return []
-    by_day = {}
-    for ts_ms, px in prices:
-        day_s = _to_midnight_utc(int(ts_ms / 1000))
-        by_day[day_s] = float(px)  # last one of the day wins (close)
-    out = [[d * 1000, by_day[d]] for d in sorted(by_day.keys())]
-    return out
+    arr = np.asarray(prices, dtype=np.float64)
+    day_ms = ONE_DAY * 1000
+    days = (arr[:, 0].astype(np.int64) // day_ms) * day_ms
+    # stable sort keeps input order within a day, so the group's last row is
+    # the last one seen (close), as with the old dict overwrite
+    order = np.argsort(days, kind="stable")
+    days, px = days[order], arr[order, 1]
+    last = np.append(days[1:] != days[:-1], True)
+    return [[d, p] for d, p in zip(days[last].tolist(), px[last].tolist())]
+
+
+def _sum_on_grid(parts):
+    """
+    Sum [(ts_ms array, value array), ...] per timestamp over the union of the grids.
+    Returns [[ts_ms, total], ...] sorted by ts ([] when there are no parts).
+    """
+    if not parts:
+        return []
+    ts = np.concatenate([p[0] for p in parts]).astype(np.int64)
+    vals = np.concatenate([p[1] for p in parts])
+    grid, inv = np.unique(ts, return_inverse=True)
+    sums = np.bincount(inv, weights=vals, minlength=grid.size)
+    return series_pairs(grid, sums)
 
 
 def get_daily_closes(coin_id: str, lookback_days: int = 365):
     """
     Returns last <=lookback_days daily closes [[ts_ms, px]...] ending today.
-    Uses your existing CG/CC fallback stack.
+    Uses your existing CG/CC fallback stack; results are reused for HIST_TTL
+    so concurrent endpoints/holdings asking for the same coin share one fetch.
+    Treat the returned list as read-only.
     """
+    key = (coin_id, lookback_days)
+    with _HIST_LOCK:
+        hit = _DAILY_CACHE.get(key)
+    if hit and (time.time() - hit["t"] < HIST_TTL):
+        return hit["data"]
+
     now_s = int(time.time())
     from_ts = now_s - max(lookback_days, 1) * ONE_DAY
-    series, _ = get_series_any(coin_id, from_ts, now_s)
-    daily = _resample_to_daily(series)
+    daily = _resample_to_daily(get_series_any(coin_id, from_ts, now_s).raw_list)
     # keep most recent lookback_days (safe if we got more)
-    return daily[-lookback_days:]
+    daily = daily[-lookback_days:]
+    if daily:  # don't pin a failed fetch for the whole TTL
+        with _HIST_LOCK:
+            _DAILY_CACHE[key] = {"t": time.time(), "data": daily}
+    return daily
+
+
+def _daily_closes_for(coins, lookback_days: int = 365):
+    """
+    {coin: get_daily_closes(coin, lookback_days)} for distinct coins, fetched concurrently.
+    """
+    coins = sorted(set(coins))
+    if not coins:
+        return {}
+    # the fetches are independent network waits, so overlap them instead of paying
+    # N round-trips back to back. A per-call pool, not IO_POOL, so a large
+    # portfolio can't starve the shared pool's other users.
+    with ThreadPoolExecutor(max_workers=min(8, len(coins))) as ex:
+        return dict(zip(coins, ex.map(lambda c: get_daily_closes(c, lookback_days), coins)))
+
+
+def get_calibration(coin_id: str, lookback_days: int = 365):
+    """
+    GBM inputs for the scenario endpoints, from get_daily_closes().
+    Returns {"days", "mu", "sigma", "n_rets", "last_px", "last_ts"};
+    days == 0 when there is no history. Recomputed only when the closes change.
+    """
+    daily = get_daily_closes(coin_id, lookback_days)
+    key = (coin_id, lookback_days)
+    with _HIST_LOCK:
+        hit = _CALIB_CACHE.get(key)
+    if hit and hit["src"] is daily:
+        return hit
+
+    mu, sigma, n_rets = log_return_stats([p[1] for p in daily])
+    cal = {
+        "src": daily,
+        "days": len(daily),
+        "mu": mu,
+        "sigma": sigma,
+        "n_rets": n_rets,
+        "last_px": float(daily[-1][1]) if daily else 0.0,
+        "last_ts": int(daily[-1][0]) if daily else 0,
+    }
+    if daily:
+        with _HIST_LOCK:
+            _CALIB_CACHE[key] = cal
+    return cal
+
+
+@njit(cache=True, fastmath=True)
+def _hw_fit(y, season_len, alpha, beta, gamma):
+    """One smoothing pass. Returns (fitted, level, trend, season) after the last point."""
+    n = y.shape[0]
+    level = y[0]
+    trend = (y[season_len] - y[0]) / season_len
+    # simple seasonal init: first season deviations
+    season = y[:season_len] - y[:season_len].mean()
+
+    # seasonal slot per step, filled once so the recursion does no div-mod
+    slot = np.empty(n, dtype=np.int64)
+    for t in range(n):
+        slot[t] = t % season_len
+
+    fitted = np.empty(n)
+    for t in range(n):
+        j = slot[t]
+        s = season[j]
+        fitted[t] = level + trend + s
+        # update
+        new_level = alpha * (y[t] - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        level = new_level
+        season[j] = gamma * (y[t] - new_level) + (1 - gamma) * s
+    return fitted, level, trend, season
 
 
 def holt_winters_additive(
@@ -1218,116 +1704,102 @@ def holt_winters_additive(
     if not daily_series or len(daily_series) < season_len * 2:
         return [], [], []
 
-    y = [float(p[1]) for p in daily_series]
+    # contiguous copy: matches the signature compiled at import
+    y = np.ascontiguousarray(np.asarray(daily_series, dtype=np.float64)[:, 1])
     n = len(y)
-
-    # init level, trend, seasonal (additive)
-    L = y[0]
-    T = (y[season_len] - y[0]) / season_len
-    S = [0.0] * season_len
-    # simple seasonal init: first season deviations
-    first_season_avg = sum(y[:season_len]) / season_len
-    for i in range(season_len):
-        S[i] = y[i] - first_season_avg
-
-    level, trend = L, T
-    season = S[:]
-
-    fitted = []
-    for t in range(n):
-        s = season[t % season_len]
-        yhat = level + trend + s
-        fitted.append(yhat)
-        err = y[t] - yhat
-        # update
-        new_level = alpha * (y[t] - s) + (1 - alpha) * (level + trend)
-        new_trend = beta * (new_level - level) + (1 - beta) * trend
-        new_s = gamma * (y[t] - new_level) + (1 - gamma) * s
-        level, trend = new_level, new_trend
-        season[t % season_len] = new_s
+    fitted, level, trend, season = _hw_fit(
+        y, int(season_len), float(alpha), float(beta), float(gamma)
+    )
 
     # residual std for naive CI
-    residuals = [y[i] - fitted[i] for i in range(len(fitted))]
-    if len(residuals) >= 5:
-        mean_err = sum(residuals) / len(residuals)
-        var = sum((e - mean_err) ** 2 for e in residuals) / max(len(residuals) - 1, 1)
-        sigma = math.sqrt(max(var, 1e-12))
+    if n >= 5:
+        sigma = math.sqrt(max(float(np.var(y - fitted, ddof=1)), 1e-12))
     else:
         sigma = 0.0
 
     # forecast h steps
     last_ts_ms = int(daily_series[-1][0])
-    out, low, high = [], [], []
-    for k in range(1, h + 1):
-        s = season[(n + (k - 1)) % season_len]
-        f = level + k * trend + s
-        ts_ms = last_ts_ms + k * ONE_DAY * 1000
-        out.append([ts_ms, float(f)])
-        # ±1.96σ naive CI (not accounting for forecast variance accumulation)
-        low.append([ts_ms, float(max(f - 1.96 * sigma, 0))])
-        high.append([ts_ms, float(max(f + 1.96 * sigma, 0))])
+    k = np.arange(1, h + 1)
+    f = level + k * trend + season[(n + (k - 1)) % season_len]
+    ts_list = (last_ts_ms + k * (ONE_DAY * 1000)).tolist()
+    # ±1.96σ naive CI (not accounting for forecast variance accumulation)
+    band = 1.96 * sigma
+    out = [[t, v] for t, v in zip(ts_list, f.tolist())]
+    low = [[t, v] for t, v in zip(ts_list, np.maximum(f - band, 0.0).tolist())]
+    high = [[t, v] for t, v in zip(ts_list, np.maximum(f + band, 0.0).tolist())]
 
     return out, low, high
 
 
-def gbm_scenarios(
-    daily_series, horizon_days=365 * 10, step_days=SCENARIO_STEPSIZE, n_paths=300
-):
+# compile (or load from the on-disk cache) at import, not on the first request.
+# quant.warm_up() covers the GBM/DCA/LTTB kernels with the dtypes the handlers pass.
+# (pool workers warm their own kernels in init_worker)
+if not _IN_POOL_CHILD:
+    _t_warm = time.perf_counter()
+    warm_up()
+    if HAVE_NUMBA:
+        _hw_fit(np.arange(14, dtype=np.float64), 7, 0.2, 0.1, 0.1)
+    app.logger.info(
+        "kernel warm-up %.2fs (numba=%s)", time.perf_counter() - _t_warm, HAVE_NUMBA
+    )
+
+# ---------- simulation process pool ----------
+# per-coin Monte-Carlo runs in separate processes. spawn, not fork: this process
+# already has threads (FX refresher, DB pool, Numba). Children unpickle tasks
+# against quant.py; under `python app.py` they also re-run this file, minus the
+# side effects guarded by _IN_POOL_CHILD. Started on first use, not at import.
+SIM_POOL_WORKERS = int(os.getenv("SIM_POOL_WORKERS", str(os.cpu_count() or 2)))
+# one coin simulates in milliseconds, less than pickling its series costs (and the
+# first use pays for spawning the workers): smaller portfolios run in-process
+SIM_POOL_MIN_TASKS = int(os.getenv("SIM_POOL_MIN_TASKS", "4"))
+_SIM_POOL = None
+_SIM_POOL_LOCK = threading.Lock()
+
+
+def _sim_pool():
+    global _SIM_POOL
+    with _SIM_POOL_LOCK:
+        if _SIM_POOL is None:
+            _SIM_POOL = ProcessPoolExecutor(
+                max_workers=SIM_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+        return _SIM_POOL
+
+
+def _drop_sim_pool(pool):
+    """Forget a broken pool so the next _sim_pool() starts a fresh one."""
+    global _SIM_POOL
+    with _SIM_POOL_LOCK:
+        if _SIM_POOL is pool:  # another request may already have replaced it
+            _SIM_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_sim_pool():
+    with _SIM_POOL_LOCK:
+        pool = _SIM_POOL
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_gbm_tasks(tasks):
     """
-    Calibrate from last ~1y log-returns. Simulate weekly GBM for horizon.
-    Returns: dict with 'p10','p50','p90' series of [ts_ms, px]
+    [gbm_worker(t) for t in tasks], on the simulation pool when there are enough
+    coins to spread. A pool whose worker died (OOM kill, crash in a kernel) is
+    replaced and the batch retried once; if that breaks too, it runs in-process.
     """
-    if not daily_series or len(daily_series) < 30:
-        return {"p10": [], "p50": [], "p90": []}
-
-    closes = [float(p[1]) for p in daily_series[-365:]]  # last year if possible
-    # log returns
-    rets = []
-    for i in range(1, len(closes)):
-        p0, p1 = closes[i - 1], closes[i]
-        if p0 > 0 and p1 > 0:
-            rets.append(math.log(p1 / p0))
-    if len(rets) < 10:
-        return {"p10": [], "p50": [], "p90": []}
-
-    mu = sum(rets) / len(rets)  # daily drift
-    # unbiased sample std
-    mean_r = mu
-    var = sum((r - mean_r) ** 2 for r in rets) / max(len(rets) - 1, 1)
-    sigma = math.sqrt(max(var, 1e-12))  # daily vol
-
-    last_px = closes[-1]
-    last_ts = int(daily_series[-1][0])
-    steps = max(1, int(horizon_days / step_days))
-
-    # pre-allocate paths at each step
-    all_paths = [[] for _ in range(steps)]
-    for _ in range(n_paths):
-        px = last_px
-        t_ts = last_ts
-        for s in range(steps):
-            # compound step_days of daily GBM in one normal draw:
-            # drift ~ mu*step_days, vol ~ sigma*sqrt(step_days)
-            z = random.gauss(0.0, 1.0)
-            drift = (mu - 0.5 * sigma * sigma) * step_days
-            shock = sigma * math.sqrt(step_days) * z
-            px = max(px * math.exp(drift + shock), 0.0)
-            t_ts += step_days * ONE_DAY * 1000
-            all_paths[s].append(px)
-
-    # percentiles per step
-    p10, p50, p90 = [], [], []
-    t_ts = last_ts
-    for s in range(steps):
-        t_ts += step_days * ONE_DAY * 1000
-        vec = sorted(all_paths[s])
-        idx10 = int(0.10 * (len(vec) - 1))
-        idx50 = int(0.50 * (len(vec) - 1))
-        idx90 = int(0.90 * (len(vec) - 1))
-        p10.append([t_ts, float(vec[idx10])])
-        p50.append([t_ts, float(vec[idx50])])
-        p90.append([t_ts, float(vec[idx90])])
-    return {"p10": p10, "p50": p50, "p90": p90}
+    if len(tasks) >= SIM_POOL_MIN_TASKS:
+        for _ in range(2):
+            pool = _sim_pool()
+            try:
+                return list(pool.map(gbm_worker, tasks))
+            except BrokenProcessPool:
+                app.logger.warning("simulation pool broke; starting a new one")
+                _drop_sim_pool(pool)
+    return [gbm_worker(t) for t in tasks]
 
 
 def _parse_date(date_str: str):
@@ -1364,14 +1836,13 @@ def get_series_days(coin_id: str, days: int):
     if hit and (now - hit["t"] < _SERIES_DAYS_TTL):
         return hit["data"]
 
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
     params = {"vs_currency": "usd", "days": str(days)}
     # Optional: interval="daily" is allowed on free, but keep it simple:
     if days >= 90:
         params["interval"] = "daily"
 
     try:
-        r = SESSION.get(url, params=params, timeout=12)
+        r = cg_get(f"/coins/{coin_id}/market_chart", params)
         j = r.json() if r.headers.get("content-type", "").startswith("application/json") else {}
         prices = j.get("prices", []) if isinstance(j, dict) else []
         if not prices:
@@ -1390,14 +1861,19 @@ def get_series_days(coin_id: str, days: int):
 
 def get_full_series_days_max(coin_id: str):
     now = time.time()
-    hit = FULL_SERIES_CACHE.get(coin_id)
+    with _HIST_LOCK:
+        hit = FULL_SERIES_CACHE.get(coin_id)
+    if hit is None:
+        hit = _cache_get(f"full:{coin_id}")  # warm restart
+        if hit:
+            with _HIST_LOCK:
+                FULL_SERIES_CACHE[coin_id] = hit
     if hit and (now - hit["t"] < FULL_SERIES_TTL):
         return hit["data"]
 
-    url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
     params = {"vs_currency": "usd", "days": "max"}  # keep simple on free tier
     try:
-        r = SESSION.get(url, params=params, timeout=12)
+        r = cg_get(f"/coins/{coin_id}/market_chart", params)
         j = r.json() if r.headers.get("content-type", "").startswith("application/json") else {}
         prices = j.get("prices", []) if isinstance(j, dict) else []
         if not prices:
@@ -1406,7 +1882,10 @@ def get_full_series_days_max(coin_id: str):
                 f"text={getattr(r,'text','')[:300]}"
             )
             return hit["data"] if hit else []
-        FULL_SERIES_CACHE[coin_id] = {"t": now, "data": prices}
+        fresh = {"t": now, "data": prices}
+        with _HIST_LOCK:
+            FULL_SERIES_CACHE[coin_id] = fresh
+        _cache_put(f"full:{coin_id}", fresh)
         return prices
     except Exception as e:
         print(f"[days_max] exception coin={coin_id}: {e}")
@@ -1415,26 +1894,29 @@ def get_full_series_days_max(coin_id: str):
 
 @app.route("/api/volatility/<coin_id>/<days>")
 def volatility_coin(coin_id, days):
+    """
+    Query: returns=1 to include the per-step log-returns (the UI only reads annualized_vol).
+    """
     data = fetch_history_cached(coin_id, days)
     prices = data.get("prices", [])
-    return jsonify(realized_volatility(prices))
+    out = realized_volatility(prices)
+    if request.args.get("returns") != "1":
+        out.pop("returns", None)
+    return jsonify_fast(out)
 
 
 @app.route("/api/sentiment/<coin_id>")
 def sentiment_coin(coin_id):
     try:
-        titles = fetch_reddit_titles(coin_id) + fetch_hn_titles(coin_id)
+        f1 = IO_POOL.submit(fetch_reddit_titles, coin_id)
+        f2 = IO_POOL.submit(fetch_hn_titles, coin_id)
+        titles = (f1.result() or []) + (f2.result() or [])
         titles = [t for t in titles if isinstance(t, str)][:25]
         if not titles:
             return jsonify({"score": None, "items": []})
-        sia = SentimentIntensityAnalyzer()
-        scored, total = [], 0.0
-        for t in titles:
-            s = sia.polarity_scores(t)["compound"]
-            total += s
-            scored.append({"title": t, "score": s})
-        avg = total / len(scored)
-        return jsonify({"score": avg, "items": scored})
+        scores = _compound_scores(titles)
+        scored = [{"title": t, "score": s} for t, s in zip(titles, scores)]
+        return jsonify({"score": statistics.fmean(scores), "items": scored})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1499,23 +1981,29 @@ def fetch_history_cc(coin_id: str, from_ts: int, to_ts: int):
 def get_series_any(coin_id: str, from_ts: int, to_ts: int):
     """
     Try CG range -> CG days/max -> CryptoCompare -> clamp last-365d.
-    Returns (series, limited_365_flag)
+    Returns a CachedSeries (limited_365 set when clamped); cached for CG_TTL
+    per hour-bucketed window.
     """
+    key = ("any", coin_id, from_ts // 3600, to_ts // 3600)
+    return _cg_cached(key, lambda: _get_series_any(coin_id, from_ts, to_ts))
+
+
+def _get_series_any(coin_id: str, from_ts: int, to_ts: int):
     # 1) Try CoinGecko range/days
     s = fetch_prices_range_or_days(coin_id, from_ts, to_ts)
     if s:
-        return s, False
+        return s
 
-    # 2) Try days_max
+    # 2) Try days_max (only once range/days came back empty: it's often refused on free tier)
     full = get_full_series_days_max(coin_id)
     if full:
         from_ms, to_ms = from_ts * 1000, to_ts * 1000
-        return [p for p in full if from_ms <= p[0] <= to_ms], False
+        return CachedSeries.from_raw(_clip_window(full, from_ms, to_ms))
 
     # 3) Try CryptoCompare
     cc = fetch_history_cc(coin_id, from_ts, to_ts)
     if cc:
-        return cc, False
+        return CachedSeries.from_raw(cc)
 
     # 4) Last resort: clamp to last 365 days
     oldest_allowed = int(time.time()) - ONE_YEAR
@@ -1524,22 +2012,28 @@ def get_series_any(coin_id: str, from_ts: int, to_ts: int):
         from_ts = oldest_allowed
         limited = True
     s2 = fetch_prices_range_or_days(coin_id, from_ts, to_ts)
-    return s2, limited
+    return replace(s2, limited_365=limited) if limited else s2
 
 
 def fetch_prices_range_or_days(coin_id: str, from_ts: int, to_ts: int):
     """
     Try market_chart/range; if empty or 429/limited, fall back to market_chart?days=
     and clip to [from_ts, to_ts].
-    Returns list[[ts_ms, price], ...] (possibly empty).
+    Returns a CachedSeries of [[ts_ms, price], ...] (possibly empty); cached like
+    get_series_any.
     """
+    key = ("range", coin_id, from_ts // 3600, to_ts // 3600)
+    return _cg_cached(
+        key, lambda: CachedSeries.from_raw(_fetch_prices_range_or_days(coin_id, from_ts, to_ts))
+    )
+
+
+def _fetch_prices_range_or_days(coin_id: str, from_ts: int, to_ts: int):
     # --- prefer range ---
-    url_range = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart/range"
     try:
-        r = SESSION.get(
-            url_range,
-            params={"vs_currency": "usd", "from": from_ts, "to": to_ts},
-            timeout=12,
+        r = cg_get(
+            f"/coins/{coin_id}/market_chart/range",
+            {"vs_currency": "usd", "from": from_ts, "to": to_ts},
         )
         j = r.json()
         if isinstance(j, dict) and isinstance(j.get("prices"), list) and j["prices"]:
@@ -1550,19 +2044,18 @@ def fetch_prices_range_or_days(coin_id: str, from_ts: int, to_ts: int):
     # --- fallback to days= ---
     # number of whole days to fetch, cap to "max" once > 365
     days = max(1, int((to_ts - from_ts + 86399) // 86400))
-    url_days = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
 
     # use 'max' for long spans (free tier supports this)
     params = {"vs_currency": "usd", "days": "max" if days > 365 else str(days)}
     try:
-        r2 = SESSION.get(url_days, params=params, timeout=12)
+        r2 = cg_get(f"/coins/{coin_id}/market_chart", params)
         j2 = r2.json()
         prices = j2.get("prices", []) if isinstance(j2, dict) else []
         if not prices:
             return []
         # clip to [from_ts, to_ts]
         from_ms, to_ms = from_ts * 1000, to_ts * 1000
-        return [p for p in prices if from_ms <= p[0] <= to_ms]
+        return _clip_window(prices, from_ms, to_ms)
     except Exception:
         return []
 
@@ -1574,11 +2067,10 @@ def _start_price_fallback(coin_id: str, start_dt: dt.datetime):
     """
 
     def hit(day):
-        url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/history"
         # IMPORTANT: date is DD-MM-YYYY for this endpoint
         params = {"date": day.strftime("%d-%m-%Y"), "localization": "false"}
         try:
-            r = SESSION.get(url, params=params, timeout=10)
+            r = cg_get(f"/coins/{coin_id}/history", params, read_timeout=10)
             j = r.json()
             return float(j.get("market_data", {}).get("current_price", {}).get("usd"))
         except Exception:
@@ -1608,27 +2100,28 @@ def api_portfolio_forecast():
         return jsonify({"error": "Bad params"}), 400
 
     # load user holdings
-    sql = (
-        "SELECT coin, amount FROM holdings WHERE user_id=%s"
-        if DB_URL else
-        "SELECT coin, amount FROM holdings WHERE user_id=?"
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (g.uid,))
+            c.execute(SQL["holding_amounts"], (g.uid,))
             rows = c.fetchall()
 
     if not rows:
         return jsonify({"series": [], "bands": {"low": [], "high": []}})
 
-    # aggregate per-day value across coins
-    agg_central, agg_low, agg_high = {}, {}, {}
-    now_daily = get_daily_closes("bitcoin", 1)  # just to get today's midnight
-    today_ms = now_daily[-1][0] if now_daily else _to_midnight_utc(int(time.time()))*1000
+    # same holdings + horizon within 10 min -> same answer (closes are cached for HIST_TTL)
+    key = (g.uid, tuple(sorted((r["coin"], float(r["amount"])) for r in rows)), h)
+    with _PF_LOCK:
+        hit = _PF_CACHE.get(key)
+    if hit is not None:
+        return jsonify_fast(hit)
+
+    dailies = _daily_closes_for(r["coin"] for r in rows if float(r["amount"]) > 0)
 
+    # aggregate per-day value across coins: (ts, value) arrays summed on one grid
+    parts_central, parts_low, parts_high = [], [], []
     for r in rows:
         coin, qty = r["coin"], float(r["amount"])
-        daily = get_daily_closes(coin, 365)
+        daily = dailies.get(coin)
         if not daily or qty <= 0:
             continue
         f, lo, hi = holt_winters_additive(daily, h=h, season_len=7)
@@ -1636,22 +2129,23 @@ def api_portfolio_forecast():
             continue
 
         # include a small 60-day tail of history so the chart has context
-        tail = daily[-60:]
-        for ts, px in tail:
-            agg_central[ts] = agg_central.get(ts, 0.0) + qty * float(px)
-
-        for ts, px in f:
-            agg_central[ts] = agg_central.get(ts, 0.0) + qty * float(px)
-        for ts, px in lo:
-            agg_low[ts] = agg_low.get(ts, 0.0) + max(0.0, qty * float(px))
-        for ts, px in hi:
-            agg_high[ts] = agg_high.get(ts, 0.0) + max(0.0, qty * float(px))
-
-    series = sorted([[ts, v] for ts, v in agg_central.items()], key=lambda x: x[0])
-    low    = sorted([[ts, agg_low.get(ts, None)] for ts, _ in series if ts in agg_low])
-    high   = sorted([[ts, agg_high.get(ts, None)] for ts, _ in series if ts in agg_high])
-
-    return jsonify({"series": series, "bands": {"low": low, "high": high}})
+        tail = np.asarray(daily[-60:], dtype=np.float64)
+        f, lo, hi = (np.asarray(x, dtype=np.float64) for x in (f, lo, hi))
+        parts_central.append((tail[:, 0], qty * tail[:, 1]))
+        parts_central.append((f[:, 0], qty * f[:, 1]))
+        parts_low.append((lo[:, 0], np.maximum(qty * lo[:, 1], 0.0)))
+        parts_high.append((hi[:, 0], np.maximum(qty * hi[:, 1], 0.0)))
+
+    # band timestamps are forecast days, all of which are in the central series
+    series = _sum_on_grid(parts_central)
+    low = _sum_on_grid(parts_low)
+    high = _sum_on_grid(parts_high)
+
+    out = {"series": series, "bands": {"low": low, "high": high}}
+    if series:  # an upstream outage shouldn't pin an empty chart for 10 min
+        with _PF_LOCK:
+            _PF_CACHE[key] = out
+    return jsonify_fast(out)
 
 @app.route("/api/portfolio_scenario")
 def api_portfolio_scenario():
@@ -1664,35 +2158,29 @@ def api_portfolio_scenario():
     except Exception:
         return jsonify({"error": "Bad params"}), 400
 
-    sql = (
-        "SELECT coin, amount FROM holdings WHERE user_id=%s"
-        if DB_URL else
-        "SELECT coin, amount FROM holdings WHERE user_id=?"
-    )
     with _db() as conn:
         with _cursor(conn) as c:
-            c.execute(sql, (g.uid,))
+            c.execute(SQL["holding_amounts"], (g.uid,))
             rows = c.fetchall()
     if not rows:
         return jsonify({"p10": [], "p50": [], "p90": []})
 
-    agg_p10, agg_p50, agg_p90 = {}, {}, {}
+    dailies = _daily_closes_for(r["coin"] for r in rows if float(r["amount"]) > 0)
+    tasks = []
     for r in rows:
         coin, qty = r["coin"], float(r["amount"])
         if qty <= 0: 
             continue
-        daily = get_daily_closes(coin, 365)
-        bands = gbm_scenarios(daily, horizon_days=int(years*365), step_days=step_days, n_paths=n)
-        for ts, px in bands["p10"]:
-            agg_p10[ts] = agg_p10.get(ts, 0.0) + qty * float(px)
-        for ts, px in bands["p50"]:
-            agg_p50[ts] = agg_p50.get(ts, 0.0) + qty * float(px)
-        for ts, px in bands["p90"]:
-            agg_p90[ts] = agg_p90.get(ts, 0.0) + qty * float(px)
-
-    def _sorted(d): 
-        return sorted([[ts, v] for ts, v in d.items()], key=lambda x: x[0])
-    return jsonify({"p10": _sorted(agg_p10), "p50": _sorted(agg_p50), "p90": _sorted(agg_p90)})
+        tasks.append((qty, dailies[coin], int(years*365), step_days, n))
+
+    # one simulation per coin (over the simulation pool for larger portfolios)
+    parts = {"p10": [], "p50": [], "p90": []}
+    for qty, bands in _run_gbm_tasks(tasks):
+        if bands["ts"].size:
+            for k in parts:
+                parts[k].append((bands["ts"], qty * bands[k]))
+
+    return jsonify_fast({k: _sum_on_grid(v) for k, v in parts.items()})
 
 @app.route("/", methods=["GET"])
 def health():
@@ -1705,6 +2193,7 @@ def whatif():
       coin_id:  'bitcoin' | 'ethereum' | ...
       amount:   float USD invested
       date:     'YYYY-MM-DD' (UTC)
+      max_points: chart points returned (default 512, LTTB-downsampled); raw=1 for all
     Returns metrics + a value-over-time series for charting.
     """
     coin_id = request.args.get("coin_id", "bitcoin").lower()
@@ -1716,6 +2205,11 @@ def whatif():
     if amount <= 0:
         return jsonify({"error": "Amount must be > 0"}), 400
 
+    try:
+        max_points = _series_max_points()
+    except ValueError:
+        return jsonify({"error": "Bad params"}), 400
+
     date_str = request.args.get("date", "2021-01-01")
     start_dt = _parse_date(date_str)
     if not start_dt:
@@ -1731,7 +2225,8 @@ def whatif():
 
     try:
         # 1) Try to get a series for [from,to]
-        prices = fetch_prices_range_or_days(coin_id, from_ts, to_ts)
+        window = fetch_prices_range_or_days(coin_id, from_ts, to_ts)
+        prices = window.raw_list
         print(
             f"[whatif] window-series len={len(prices)} coin={coin_id} from={from_ts} to={to_ts}"
         )
@@ -1740,15 +2235,15 @@ def whatif():
         from_ms = from_ts * 1000
         to_ms_ms = to_ts * 1000
 
-        # what we'll actually plot; start with the window series
-        chart_series = list(prices)
+        # what we'll actually plot; start with the window series (replaced, never mutated)
+        chart_series = prices
 
         # 2) Start price from the window series
         start_price = _first_at_or_after(prices, target_ms) if prices else None
         print(f"[whatif] start from window-series: {start_price}")
 
         # 2a) If missing, try /history for the exact DD-MM-YYYY (±3d)
-        if not start_price or start_price <= 0:
+        if not (start_price and start_price > 0):
             h = _start_price_fallback(coin_id, start_dt)
             print(f"[whatif] start from /history: {h}")
             if h and h > 0:
@@ -1764,10 +2259,10 @@ def whatif():
                 if s and s > 0:
                     start_price = s
                     # clip for plotting
-                    chart_series = [p for p in full_max if from_ms <= p[0] <= to_ms_ms]
+                    chart_series = _clip_window(full_max, from_ms, to_ms_ms)
 
         # 2b) If still missing, pull a days-series and pick first ≥ target
-        if not start_price or start_price <= 0:
+        if not (start_price and start_price > 0):
             days_needed = max(1, int((to_ts - from_ts + 86399) // 86400))  # whole days
             # First try a modest window to reduce rate-limits, then escalate
             for d in (days_needed, 365, 1200):  # ~1y then ~3.3y
@@ -1780,7 +2275,7 @@ def whatif():
                     if s and s > 0:
                         start_price = s
                         # use this series for the chart (clipped to the requested window)
-                        chart_series = [p for p in full if from_ms <= p[0] <= to_ms_ms]
+                        chart_series = _clip_window(full, from_ms, to_ms_ms)
                         break
 
         # 2b continued — one more narrow retry for finicky coins like dogecoin
@@ -1797,7 +2292,7 @@ def whatif():
                     start_price = s
 
         # 2c) As a final resort, get full lifetime (days=max) and pick first ≥ target
-        if not start_price or start_price <= 0:
+        if not (start_price and start_price > 0):
             full_max = get_full_series_days_max(coin_id)
             print(f"[whatif] days=max len={len(full_max)}")
             if full_max:
@@ -1806,9 +2301,9 @@ def whatif():
                 if s and s > 0:
                     start_price = s
                     # clip the lifetime series to the requested window for plotting
-                    chart_series = [p for p in full_max if from_ms <= p[0] <= to_ms_ms]
+                    chart_series = _clip_window(full_max, from_ms, to_ms_ms)
 
-        if not start_price or start_price <= 0:
+        if not (start_price and start_price > 0):
             print(
                 f"[whatif] start_price failed: coin={coin_id} date={start_dt.isoformat()} prices_len={len(prices)}"
             )
@@ -1819,19 +2314,17 @@ def whatif():
 
         # 3) Current price
         if prices:
-            current_price = float(prices[-1][1])
+            current_price = float(window.px_arr[-1])
         elif chart_series:
             current_price = float(chart_series[-1][1])
         else:
-            # if no series at all, take current from simple/price
-            sp = SESSION.get(
-                "https://api.coingecko.com/api/v3/simple/price",
-                params={"ids": coin_id, "vs_currencies": "usd"},
-                timeout=8,
-            ).json()
-            current_price = float(sp.get(coin_id, {}).get("usd") or 0)
-
-        if current_price <= 0:
+            # if no series at all, take current from simple/price (batched with other asks)
+            try:
+                current_price = quote_usd(coin_id).result(timeout=QUOTE_WAIT) or 0.0
+            except FutureTimeout:
+                current_price = 0.0
+
+        if not (current_price > 0):  # NaN passes a `<= 0` check
             return jsonify({"error": "Could not determine current price."}), 422
 
         shares = amount / start_price
@@ -1844,21 +2337,22 @@ def whatif():
         except Exception:
             cagr_pct = None
 
-        # Portfolio value series for the chart (use whichever series we ended up with)
-        value_series = [[ts, float(px) * shares] for ts, px in chart_series]
+        # Portfolio value series for the chart (use whichever series we ended up with);
+        # the window series already has packed arrays, fallbacks are packed once here
+        chart = window if chart_series is prices else CachedSeries.from_raw(chart_series)
+        v = chart.px_arr * shares
 
-        # Max drawdown (safe on empty)
+        # Max drawdown (safe on empty): running peak via maximum.accumulate
         max_dd_pct = 0.0
-        if value_series:
-            peak = value_series[0][1]
-            for _, v in value_series:
-                peak = max(peak, v)
-                if peak > 0:
-                    dd = (peak - v) / peak * 100.0
-                    if dd > max_dd_pct:
-                        max_dd_pct = dd
-
-        return jsonify(
+        if v.size:
+            # branchless: values are price * shares >= 0, so a zero peak only spans
+            # zero values and 0/1 replaces the 0/0 branch. fmax skips a missing (nan)
+            # price instead of letting it poison every later peak.
+            peaks = np.fmax.accumulate(v)
+            safe = np.where(peaks > 0, peaks, 1.0)
+            max_dd_pct = max(0.0, float(np.fmax.reduce((peaks - v) / safe)) * 100.0)
+
+        return jsonify_series(
             {
                 "coin": coin_id,
                 "amount": amount,
@@ -1871,8 +2365,10 @@ def whatif():
                 "roi_pct": roi_pct,
                 "cagr_pct": cagr_pct,
                 "max_drawdown_pct": max_dd_pct,
-                "series": value_series,
-            }
+            },
+            chart.ts_arr,
+            v,
+            max_points=max_points,
         )
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1886,7 +2382,9 @@ def dca():
       amount:   float USD invested per contribution (e.g., 50)
       start:    'YYYY-MM-DD' or 'DD-MM-YYYY'
       freq:     'weekly' | 'monthly' (default: weekly)
-    Returns: invested_total, contributions, shares, current_value, roi_pct, cagr_pct,
+      max_points: chart points returned (default 512, LTTB-downsampled); raw=1 for all
+    Returns: invested_total, contributions (priced buys; scheduled_contributions counts
+             every date), shares, current_value, roi_pct, cagr_pct,
              series (value-over-time), lump_sum comparison.
     """
     coin_id = request.args.get("coin_id", "bitcoin").lower()
@@ -1898,6 +2396,11 @@ def dca():
     if amt_per <= 0:
         return jsonify({"error": "Amount must be > 0"}), 400
 
+    try:
+        max_points = _series_max_points()
+    except ValueError:
+        return jsonify({"error": "Bad params"}), 400
+
     freq = request.args.get("freq", "weekly")
     start_dt = _parse_date(request.args.get("start", "2021-01-01"))
     if not start_dt:
@@ -1909,35 +2412,34 @@ def dca():
         return jsonify({"error": "Start must be in the past"}), 400
 
     # Use new unified fetch
-    series, limited_365 = get_series_any(coin_id, from_ts, to_ts)
-    if not series:
+    cs = get_series_any(coin_id, from_ts, to_ts)
+    if not cs:
         return jsonify({"error": "No price data"}), 422
+    series, limited_365 = cs.raw_list, cs.limited_365
 
     from_ms, to_ms = from_ts * 1000, to_ts * 1000
-    chart_series = [p for p in series if from_ms <= p[0] <= to_ms] or list(series)
+    lo, hi = cs.bounds(from_ms, to_ms)
+    i_start = lo  # first point >= from_ms: the lump-sum buy below
+    if lo >= hi:  # nothing inside the window: chart the whole series
+        lo, hi = 0, len(series)
 
     step_days = 7 if freq == "weekly" else 30
-    step = dt.timedelta(days=step_days)
-    d = start_dt
-
-    shares = 0.0
-    invested = 0.0
 
-    while int(d.timestamp()) <= to_ts:
-        price = _first_at_or_after(series, int(d.timestamp()) * 1000)
-        if price and price > 0:
-            shares += amt_per / price
-            invested += amt_per
-        d += step
+    # price at the first point >= each contribution date, or the last point once
+    # dates run past the series (_first_at_or_after rules); compiled when Numba is present
+    step_ms = step_days * ONE_DAY * 1000
+    shares, n_priced = dca_accum(cs.ts_arr, cs.px_arr, from_ms, to_ms, step_ms, amt_per)
+    invested = amt_per * n_priced
+    n_scheduled = (to_ms - from_ms) // step_ms + 1  # dates tried, priced or not
 
-    if invested <= 0 or shares <= 0:
+    if invested <= 0 or not (shares > 0):
         return jsonify({"error": "No valid contribution points"}), 422
 
-    cur_price = float(chart_series[-1][1]) if chart_series else float(series[-1][1])
+    cur_price = float(cs.px_arr[hi - 1])  # last charted point (hi > lo after the fallback)
+    if not (cur_price > 0):  # NaN passes a `<= 0` check
+        return jsonify({"error": "Could not determine current price."}), 422
     current_value = shares * cur_price
 
-    dca_value_series = [[ts, float(px) * shares] for ts, px in chart_series]
-
     roi_pct = (current_value - invested) / invested * 100.0
     years = max((to_ts - from_ts) / (365.0 * 24 * 3600), 1e-9)
     try:
@@ -1945,7 +2447,10 @@ def dca():
     except Exception:
         cagr_pct = None
 
-    start_price = _first_at_or_after(series, from_ms) or 0.0
+    if i_start < len(cs):
+        start_price = float(cs.px_arr[i_start])
+    else:  # window starts after the data: nearest point, as _first_at_or_after
+        start_price = _first_at_or_after(series, from_ms) or 0.0
     lump = {}
     if start_price > 0:
         ls_shares = invested / start_price
@@ -1957,22 +2462,25 @@ def dca():
             "roi_pct": (ls_value - invested) / invested * 100.0,
         }
 
-    return jsonify(
+    return jsonify_series(
         {
             "coin": coin_id,
             "freq": freq,
             "amount_per": amt_per,
             "invested_total": invested,
-            "contributions": int((to_ts - from_ts) // (step_days * 24 * 3600) + 1),
+            "contributions": n_priced,
+            "scheduled_contributions": n_scheduled,
             "shares": shares,
             "current_price": cur_price,
             "current_value": current_value,
             "roi_pct": roi_pct,
             "cagr_pct": cagr_pct,
-            "series": dca_value_series,
             "lump_sum": lump,
             "limited_365": bool(limited_365),
-        }
+        },
+        cs.ts_arr[lo:hi],
+        cs.px_arr[lo:hi] * shares,
+        max_points=max_points,
     )
 
 # ================== run ==================
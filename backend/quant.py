@@ -0,0 +1,289 @@
+"""
+Monte-Carlo helpers for the scenario endpoints (plus the historical DCA kernel).
+
+Kept free of Flask/DB/network imports so process-pool workers can import
+this module cheaply (see _sim_pool in app.py).
+"""
+import math, threading
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAVE_NUMBA = True
+except ImportError:  # Numba is optional: jitted kernels then run as plain Python
+    HAVE_NUMBA = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
+ONE_DAY = 24 * 3600
+
+# one PCG64 stream per process (spawned pool workers each seed their own).
+# Generator methods hold the bit generator's lock, so threads can share it.
+_RNG = np.random.default_rng()
+
+
+def series_pairs(ts, values):
+    """[[ts_ms, v], ...] from parallel arrays (int timestamps, float values) for JSON."""
+    return [[t, v] for t, v in zip(ts.tolist(), values.tolist())]
+
+
+def percentile_arrays(values, last_ts, step_days):
+    """
+    p10/p50/p90 across paths of a (n_paths, steps) matrix, one point per step.
+    Returns (ts int64 (steps,), bands float64 (3, steps)); step k is last_ts + k*step_days.
+    """
+    # vec[int(q * (n - 1))] of each sorted column. A full np.sort beats
+    # np.partition / np.percentile here: NumPy's sort is SIMD-vectorized, select is not.
+    n = values.shape[0]
+    idxs = [int(0.10 * (n - 1)), int(0.50 * (n - 1)), int(0.90 * (n - 1))]
+    bands = np.sort(values, axis=0)[idxs]
+    steps = bands.shape[1]
+    ts = last_ts + np.arange(1, steps + 1, dtype=np.int64) * (step_days * ONE_DAY * 1000)
+    return ts, bands
+
+
+def percentile_bands(values, last_ts, step_days):
+    """As percentile_arrays, as (p10, p50, p90) lists of [ts_ms, v]."""
+    ts, bands = percentile_arrays(values, last_ts, step_days)
+    return tuple(series_pairs(ts, band) for band in bands)
+
+
+def log_return_stats(closes):
+    """
+    Daily drift/vol of log-returns over a close series (non-positive closes dropped).
+    Returns (mu, sigma, n_returns); sigma uses the unbiased sample variance.
+    """
+    px = np.asarray(closes, dtype=np.float64)
+    px = px[px > 0]
+    if px.size < 3:
+        return 0.0, 0.0, max(int(px.size) - 1, 0)
+    rets = np.diff(np.log(px))
+    var = float(rets.var(ddof=1))
+    return float(rets.mean()), math.sqrt(max(var, 1e-12)), int(rets.size)
+
+
+# ---------- Monte-Carlo kernels (Numba) ----------
+# Numba's default "workqueue" threading layer aborts if two threads launch
+# parallel kernels at once (threaded dev server / gunicorn --threads).
+_JIT_PARALLEL_LOCK = threading.Lock()
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _gbm_paths_jit(last_px, mu, sigma, dt, steps, n_paths):
+    out = np.empty((n_paths, steps))
+    drift = (mu - 0.5 * sigma * sigma) * dt
+    vol_sqrt = sigma * math.sqrt(dt)
+    for p in prange(n_paths):
+        px = last_px
+        for s in range(steps):
+            z = np.random.normal(0.0, 1.0)
+            px *= math.exp(drift + vol_sqrt * z)
+            out[p, s] = px
+    return out
+
+
+def _gbm_paths_np(last_px, mu, sigma, dt, steps, n_paths):
+    z = _RNG.standard_normal((n_paths, steps))
+    drift = (mu - 0.5 * sigma * sigma) * dt
+    vol_sqrt = sigma * math.sqrt(dt)
+    increments = drift + vol_sqrt * z
+    return last_px * np.exp(np.cumsum(increments, axis=1))
+
+
+def simulate_gbm_paths(last_px, mu, sigma, dt, steps, n_paths):
+    """
+    GBM price paths from daily drift/vol; each step compounds `dt` days
+    in one normal draw. Returns ndarray (n_paths, steps).
+    Uses the Numba kernel when available, else the vectorized NumPy form.
+    """
+    args = (float(last_px), float(mu), float(sigma), float(dt), int(steps), int(n_paths))
+    if not HAVE_NUMBA:
+        return _gbm_paths_np(*args)
+    with _JIT_PARALLEL_LOCK:
+        return _gbm_paths_jit(*args)
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _dca_values_jit(mu, sigma, step_days, n_paths, steps, last_px, amt_per):
+    out = np.empty((n_paths, steps))
+    drift = (mu - 0.5 * sigma * sigma) * step_days
+    vol_sqrt = sigma * math.sqrt(step_days)
+    for p in prange(n_paths):
+        px = last_px
+        sh = 0.0
+        for s in range(steps):
+            z = np.random.normal(0.0, 1.0)
+            px = max(px * math.exp(drift + vol_sqrt * z), 0.0)
+            if px > 0:
+                sh += amt_per / px
+            out[p, s] = sh * px
+    return out
+
+
+def simulate_dca(mu, sigma, step_days, n_paths, steps, last_px, amt_per):
+    """
+    Portfolio VALUE paths for a fixed buy of `amt_per` at every GBM step.
+    Returns ndarray (n_paths, steps).
+    """
+    if not HAVE_NUMBA:
+        paths = _gbm_paths_np(last_px, mu, sigma, step_days, steps, n_paths)
+        return np.cumsum(amt_per / paths, axis=1) * paths
+    args = (float(mu), float(sigma), float(step_days), int(n_paths), int(steps),
+            float(last_px), float(amt_per))
+    with _JIT_PARALLEL_LOCK:
+        return _dca_values_jit(*args)
+
+
+# ---------- historical DCA ----------
+@njit(cache=True)
+def _dca_accum_jit(ts, px, start_ms, end_ms, step_ms, amt):
+    n = ts.size
+    last = np.searchsorted(ts, ts[n - 1])  # first of any duplicate last ts
+    shares = 0.0
+    n_priced = 0
+    i = 0  # dates only move forward, so one cursor walk replaces a search per date
+    t = start_ms
+    while t <= end_ms:
+        while i < n and ts[i] < t:
+            i += 1
+        j = i if i < n else last
+        if px[j] > 0:
+            shares += amt / px[j]
+            n_priced += 1
+        t += step_ms
+    return shares, n_priced
+
+
+def _dca_accum_np(ts, px, start_ms, end_ms, step_ms, amt):
+    idx = np.searchsorted(ts, np.arange(start_ms, end_ms + 1, step_ms, dtype=np.int64))
+    last = np.searchsorted(ts, ts[-1])
+    prices = px[np.where(idx < ts.size, idx, last)]
+    ok = prices > 0
+    return float((amt / prices[ok]).sum()), int(ok.sum())
+
+
+def dca_accum(ts, px, start_ms, end_ms, step_ms, amt):
+    """
+    Buy `amt` at every start_ms + k*step_ms <= end_ms at the price of the first
+    point >= that date (the last point once dates run past the series);
+    non-positive/missing prices are skipped.
+    ts: ascending int64 ms, px: float64. Returns (shares, n_priced).
+    """
+    if ts.size == 0:
+        return 0.0, 0
+    args = (ts, px, int(start_ms), int(end_ms), int(step_ms), float(amt))
+    if not HAVE_NUMBA:
+        return _dca_accum_np(*args)
+    shares, n_priced = _dca_accum_jit(*args)
+    return float(shares), int(n_priced)
+
+
+# ---------- chart downsampling ----------
+@njit(cache=True)
+def _lttb_jit(x, y, n_out):
+    n = x.size
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[n_out - 1] = n - 1
+    every = (n - 2) / (n_out - 2)  # interior points per bucket (> 1)
+    a = 0  # previously kept point
+    for i in range(n_out - 2):
+        # average of the next bucket (the last one is just the final point)
+        s = int(math.floor((i + 1) * every)) + 1
+        e = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = 0.0
+        avg_y = 0.0
+        for j in range(s, e):
+            avg_x += x[j]
+            avg_y += y[j]
+        avg_x /= e - s
+        avg_y /= e - s
+        # keep the point of this bucket spanning the largest triangle
+        ax = x[a]
+        ay = y[a]
+        best = -1.0
+        best_j = int(math.floor(i * every)) + 1
+        for j in range(best_j, s):
+            area = abs((ax - avg_x) * (y[j] - ay) - (ax - x[j]) * (avg_y - ay))
+            if area > best:
+                best = area
+                best_j = j
+        out[i + 1] = best_j
+        a = best_j
+    return out
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points of the line (x, y)
+    that keep its visual shape (peaks/troughs survive, first and last always kept).
+    Returns every index when the line already has <= n_out points (n_out >= 3).
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    y = np.ascontiguousarray(y, dtype=np.float64)
+    return _lttb_jit(x, y, int(n_out))
+
+
+def gbm_scenarios(
+    daily_series, horizon_days=365 * 10, step_days=7, n_paths=300
+):
+    """
+    Calibrate from last ~1y log-returns. Simulate weekly GBM for horizon.
+    Returns: dict of ndarrays 'ts' (int64 ms) and 'p10','p50','p90' (px), one entry
+    per step; all empty when history is too short. See series_pairs() for JSON.
+    """
+    empty = {
+        "ts": np.empty(0, dtype=np.int64),
+        "p10": np.empty(0), "p50": np.empty(0), "p90": np.empty(0),
+    }
+    if not daily_series or len(daily_series) < 30:
+        return empty
+
+    closes = [float(p[1]) for p in daily_series[-365:]]  # last year if possible
+    mu, sigma, n_rets = log_return_stats(closes)  # daily drift / vol (ddof=1)
+    if n_rets < 10:
+        return empty
+
+    last_px = closes[-1]
+    last_ts = int(daily_series[-1][0])
+    steps = max(1, int(horizon_days / step_days))
+
+    # compound step_days of daily GBM in one normal draw: (n_paths, steps)
+    paths = simulate_gbm_paths(last_px, mu, sigma, step_days, steps, n_paths)
+
+    # percentiles per step
+    ts, bands = percentile_arrays(paths, last_ts, step_days)
+    return {"ts": ts, "p10": bands[0], "p50": bands[1], "p90": bands[2]}
+
+
+def gbm_worker(task):
+    """
+    Process-pool entry point: task = (qty, daily, horizon_days, step_days, n_paths).
+    Returns (qty, bands) with bands as from gbm_scenarios.
+    """
+    qty, daily, horizon_days, step_days, n_paths = task
+    return qty, gbm_scenarios(daily, horizon_days=horizon_days, step_days=step_days, n_paths=n_paths)
+
+
+def init_worker():
+    # the pool already spreads coins over cores; one Numba thread per process
+    if HAVE_NUMBA:
+        import numba
+        numba.set_num_threads(1)
+    warm_up()
+
+
+def warm_up():
+    # compile (or load from the on-disk cache) now, not on the first request
+    if HAVE_NUMBA:
+        simulate_gbm_paths(1.0, 0.0, 0.01, 1.0, 2, 2)
+        simulate_dca(0.0, 0.01, 1.0, 2, 2, 1.0, 1.0)
+        dca_accum(np.arange(2, dtype=np.int64), np.ones(2), 0, 1, 1, 1.0)
+        lttb_indices(np.arange(4.0), np.ones(4), 3)